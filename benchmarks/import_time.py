@@ -0,0 +1,79 @@
+"""
+Compare the time taken to start a process that binds many services but only
+uses one, when the implementations are imported eagerly and when they are
+bound using import strings.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+
+
+_number_of_services = 40
+_import_cost = 0.005
+
+_service_module = """
+import time
+time.sleep({import_cost})
+
+class Service{index}(object):
+    pass
+"""
+
+_eager_script = """
+import zuice
+{imports}
+bindings = zuice.Bindings()
+{binds}
+zuice.Injector(bindings).get("service0")
+"""
+
+_lazy_script = """
+import zuice
+bindings = zuice.Bindings()
+{binds}
+zuice.Injector(bindings).get("service0")
+"""
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        package_dir = os.path.join(directory, "services")
+        os.mkdir(package_dir)
+        open(os.path.join(package_dir, "__init__.py"), "w").close()
+        for index in range(_number_of_services):
+            with open(os.path.join(package_dir, "service{0}.py".format(index)), "w") as module_file:
+                module_file.write(_service_module.format(index=index, import_cost=_import_cost))
+        
+        indices = range(_number_of_services)
+        eager_script = _eager_script.format(
+            imports="\n".join("from services.service{0} import Service{0}".format(index) for index in indices),
+            binds="\n".join("bindings.bind('service{0}').to_type(Service{0})".format(index) for index in indices),
+        )
+        lazy_script = _lazy_script.format(
+            binds="\n".join("bindings.bind('service{0}').to_import('services.service{0}:Service{0}')".format(index) for index in indices),
+        )
+        
+        print("eager: {0:.3f}s".format(_time_script(eager_script, directory)))
+        print("lazy: {0:.3f}s".format(_time_script(lazy_script, directory)))
+    finally:
+        shutil.rmtree(directory)
+
+
+def _time_script(script, directory):
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join([directory, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))])
+    command = [sys.executable, "-c", script]
+    return min(timeit.repeat(
+        lambda: subprocess.check_call(command, env=environment),
+        number=1,
+        repeat=5,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Measure the time taken to retrieve a request handler whose dependencies
+include singletons, values scoped to the request and the request itself.
+"""
+
+import timeit
+
+import zuice
+
+
+_number = 50000
+
+Request = zuice.key("Request")
+
+
+class Config(object):
+    pass
+
+
+class Database(zuice.Base):
+    _config = zuice.dependency(Config)
+
+
+class Session(zuice.Base):
+    _database = zuice.dependency(Database)
+    _request = zuice.dependency(Request)
+
+
+class Handler(zuice.Base):
+    _session = zuice.dependency(Session)
+    _database = zuice.dependency(Database)
+    _user = zuice.dependency("user")
+
+
+def main():
+    bindings = zuice.Bindings()
+    bindings.bind(Config).singleton()
+    bindings.bind(Database).singleton()
+    with bindings.scope(Request) as request_bindings:
+        request_bindings.bind("user").to_provider(lambda injector: object())
+    
+    injector = zuice.Injector(bindings)
+    request = object()
+    injector.get(Handler, {Request: request})
+    
+    lookups = [
+        ("scoped lookup", lambda: injector.get(Handler, {Request: request})),
+        ("singleton lookup", lambda: injector.get(Database)),
+    ]
+    for name, lookup in lookups:
+        seconds = min(timeit.repeat(lookup, number=_number, repeat=5))
+        print("{0}: {1:.2f}us".format(name, seconds / _number * 1000000))
+
+
+if __name__ == "__main__":
+    main()
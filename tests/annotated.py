@@ -0,0 +1,76 @@
+import typing
+from typing import Annotated
+
+import zuice
+
+
+class Apple(object):
+    pass
+
+
+@zuice.inject
+class Basket(zuice.Base):
+    apple: "Apple"
+    fruit: "Fruit"
+
+
+class Fruit(object):
+    pass
+
+
+@zuice.inject
+class Picker(zuice.Base):
+    _apple: Apple
+
+
+@zuice.inject
+class PickerWithValues(zuice.Base):
+    _apple: Apple
+    limit: int = 3
+    instances: typing.ClassVar[int]
+
+
+Name = zuice.key("Name")
+
+
+@zuice.inject
+class Greeter(zuice.Base):
+    _name: Annotated[str, Name]
+
+
+@zuice.inject
+class MixedPicker(zuice.Base):
+    _apple = zuice.dependency(Apple)
+    _fruit: Fruit
+
+
+@zuice.inject
+class InjectablePicker(object):
+    def __init__(self, apple: Apple, name: Annotated[str, Name], limit=3):
+        self.apple = apple
+        self.name = name
+        self.limit = limit
+
+
+@zuice.inject
+class UncachedPicker(zuice.Base):
+    _apple: Apple
+
+
+class Legacy(zuice.Base):
+    counter: int
+    _apple = zuice.dependency(Apple)
+
+
+class AnnotatedMixin(object):
+    counter: int
+
+
+@zuice.inject
+class MixedInPicker(AnnotatedMixin, zuice.Base):
+    _apple: Apple
+
+
+@zuice.inject
+class SubPicker(Picker):
+    _fruit: Fruit
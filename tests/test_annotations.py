@@ -0,0 +1,113 @@
+import sys
+
+from nose.tools import assert_equal
+from nose.tools import assert_raises
+from nose.plugins.skip import SkipTest
+
+import zuice
+from zuice import Bindings
+from zuice import Injector
+
+if sys.version_info < (3, 9):
+    raise SkipTest("typing.Annotated is not available")
+
+import typing
+
+from .annotated import Apple, Basket, Fruit, Greeter, InjectablePicker, MixedPicker, Name
+from .annotated import Legacy, MixedInPicker, Picker, PickerWithValues, SubPicker, UncachedPicker
+
+
+def test_annotated_attributes_of_base_classes_are_injected():
+    apple = Apple()
+    bindings = Bindings()
+    bindings.bind(Apple).to_instance(apple)
+    
+    assert Injector(bindings).get(Picker)._apple is apple
+
+
+def test_annotations_of_base_classes_without_inject_are_ignored():
+    apple = Apple()
+    
+    assert Legacy(apple)._apple is apple
+    legacy = Injector(Bindings()).get(Legacy)
+    assert isinstance(legacy._apple, Apple)
+    assert not hasattr(legacy, "counter")
+
+
+def test_annotations_of_classes_without_inject_are_ignored_by_subclasses():
+    picker = Injector(Bindings()).get(MixedInPicker)
+    assert isinstance(picker._apple, Apple)
+    assert not hasattr(picker, "counter")
+
+
+def test_annotations_of_injectable_base_classes_are_inherited():
+    picker = Injector(Bindings()).get(SubPicker)
+    assert isinstance(picker._apple, Apple)
+    assert isinstance(picker._fruit, Fruit)
+
+
+def test_forward_references_in_annotations_are_resolved():
+    basket = Injector(Bindings()).get(Basket)
+    assert isinstance(basket.apple, Apple)
+    assert isinstance(basket.fruit, Fruit)
+
+
+def test_annotated_attributes_with_values_and_class_variables_are_not_injected():
+    picker = Injector(Bindings()).get(PickerWithValues)
+    assert isinstance(picker._apple, Apple)
+    assert_equal(3, picker.limit)
+    assert not hasattr(picker, "instances")
+
+
+def test_keys_can_be_given_using_annotated_metadata():
+    assert_equal("Bob", Injector(Bindings()).get(Greeter, {Name: "Bob"})._name)
+
+
+def test_annotated_attributes_can_be_passed_manually():
+    apple = Apple()
+    fruit = Fruit()
+    
+    picker = MixedPicker(apple, fruit)
+    assert picker._apple is apple
+    assert picker._fruit is fruit
+    assert MixedPicker(apple=apple, fruit=fruit)._fruit is fruit
+
+
+def test_annotated_constructor_parameters_of_injectable_classes_are_injected():
+    apple = Apple()
+    bindings = Bindings()
+    bindings.bind(Apple).to_instance(apple)
+    
+    picker = Injector(bindings).get(InjectablePicker, {Name: "Bob"})
+    assert picker.apple is apple
+    assert_equal("Bob", picker.name)
+    assert_equal(3, picker.limit)
+
+
+def test_injectable_classes_must_annotate_parameters_without_defaults():
+    @zuice.inject
+    class Picker(object):
+        def __init__(self, apple):
+            pass
+    
+    assert_raises(TypeError, lambda: Injector(Bindings()).get(Picker))
+
+
+def test_type_hints_are_resolved_once_per_class():
+    calls = []
+    original_get_type_hints = typing.get_type_hints
+    
+    def get_type_hints(*args, **kwargs):
+        calls.append(args)
+        return original_get_type_hints(*args, **kwargs)
+    
+    typing.get_type_hints = get_type_hints
+    try:
+        injector = Injector(Bindings())
+        injector.get(UncachedPicker)
+        injector.get(UncachedPicker)
+        Injector(Bindings()).get(UncachedPicker)
+    finally:
+        typing.get_type_hints = original_get_type_hints
+    
+    assert_equal(1, len(calls))
@@ -3,6 +3,9 @@ from nose.tools import assert_equals
 
 from zuice.bindings import AlreadyBoundException
 from zuice.bindings import Bindings
+from zuice.bindings import SetOf
+from zuice.bindings import Module
+from zuice.bindings import compose
 
 class Apple(object):
     pass
@@ -52,3 +55,60 @@ def test_cannot_override_existing_bindings():
     new_bindings.bind("maximum_threads").to_instance(2)
     
     assert_raises(AlreadyBoundException, lambda: bindings.update(new_bindings))
+
+def test_cannot_multibind_key_that_is_already_bound():
+    bindings = Bindings()
+    bindings.bind(SetOf("fruit")).to_instance(())
+    assert_raises(AlreadyBoundException, lambda: bindings.multibind(SetOf("fruit")))
+
+def test_cannot_override_existing_bindings_with_multibindings():
+    bindings = Bindings()
+    bindings.bind(SetOf("fruit")).to_instance(())
+    
+    new_bindings = Bindings()
+    new_bindings.multibind(SetOf("fruit"))
+    
+    assert_raises(AlreadyBoundException, lambda: bindings.update(new_bindings))
+
+def test_composed_bindings_include_bindings_from_all_modules():
+    core = Module(lambda bindings: bindings.bind("minimum_threads").to_instance(2))
+    web = Module(lambda bindings: bindings.bind("maximum_threads").to_instance(5), includes=[core])
+    
+    bindings = compose([web])
+    assert_equals(bindings["minimum_threads"].provider(None), 2)
+    assert_equals(bindings["maximum_threads"].provider(None), 5)
+
+def test_modules_included_by_several_modules_are_installed_once():
+    configured = []
+    
+    def configure_core(bindings):
+        configured.append(True)
+        bindings.bind("minimum_threads").to_instance(2)
+    
+    core = Module(configure_core)
+    web = Module(includes=[core])
+    worker = Module(includes=[core])
+    
+    bindings = compose([web, worker])
+    assert_equals(bindings["minimum_threads"].provider(None), 2)
+    assert_equals(1, len(configured))
+
+def test_cannot_compose_modules_that_bind_the_same_key():
+    web = Module(lambda bindings: bindings.bind("maximum_threads").to_instance(5))
+    worker = Module(lambda bindings: bindings.bind("maximum_threads").to_instance(2))
+    
+    assert_raises(AlreadyBoundException, lambda: compose([web, worker]))
+
+def test_overrides_replace_bindings_from_modules():
+    web = Module(lambda bindings: bindings.bind("maximum_threads").to_instance(5))
+    test = Module(lambda bindings: bindings.bind("maximum_threads").to_instance(1))
+    
+    bindings = compose([web], overrides=[test])
+    assert_equals(bindings["maximum_threads"].provider(None), 1)
+
+def test_composed_bindings_cannot_be_modified_and_are_not_copied():
+    bindings = compose([Module(lambda bindings: bindings.bind("maximum_threads").to_instance(5))])
+    
+    assert_raises(TypeError, lambda: bindings.bind("minimum_threads").to_instance(2))
+    assert_raises(TypeError, lambda: bindings.update(Bindings()))
+    assert bindings.copy() is bindings
@@ -1,5 +1,15 @@
+import copy
+import gc
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+
 from nose.tools import assert_equal
 from nose.tools import assert_raises
+from nose.plugins.skip import SkipTest
 
 import zuice
 from zuice import Bindings
@@ -41,6 +51,42 @@ def test_bind_type_to_provider():
     assert injector.get(Apple) is apple
 
 
+def test_bind_to_import_path_imports_type_on_first_retrieval():
+    directory = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(directory, "zuice_lazy_apple.py"), "w") as module_file:
+            module_file.write("class LazyApple(object):\n    pass\n")
+        sys.path.insert(0, directory)
+        
+        bindings = Bindings()
+        bindings.bind(Apple).to_import("zuice_lazy_apple:LazyApple")
+        injector = Injector(bindings)
+        assert "zuice_lazy_apple" not in sys.modules
+        
+        apple = injector.get(Apple)
+        assert_equal("LazyApple", type(apple).__name__)
+        assert "zuice_lazy_apple" in sys.modules
+    finally:
+        sys.path.remove(directory)
+        sys.modules.pop("zuice_lazy_apple", None)
+        shutil.rmtree(directory)
+
+
+def test_bind_to_import_path_cannot_bind_key_to_itself():
+    bindings = Bindings()
+    bindings.bind(Apple).to_import(__name__ + ":Apple")
+    injector = Injector(bindings)
+    assert_raises(TypeError, lambda: injector.get(Apple))
+
+
+def test_bind_type_to_name_containing_colon_binds_to_name():
+    bindings = Bindings()
+    bindings.bind("db:primary").to_instance("primary")
+    bindings.bind("db").to_type("db:primary")
+    injector = Injector(bindings)
+    assert_equal("primary", injector.get("db"))
+
+
 def test_get_throws_exception_if_no_such_binding_exists_and_object_has_init_args():
     class Donkey(object):
         def __init__(self, legs):
@@ -78,6 +124,41 @@ def test_can_inject_class_with_no_constructor_arguments():
     assert_equal(10, coconut.x)
 
 
+def test_types_are_only_inspected_once_per_injector():
+    class Coconut(object):
+        pass
+    
+    calls = []
+    original_has_no_arg_constructor = zuice.reflect.has_no_arg_constructor
+    
+    def has_no_arg_constructor(cls):
+        calls.append(cls)
+        return original_has_no_arg_constructor(cls)
+    
+    zuice.reflect.has_no_arg_constructor = has_no_arg_constructor
+    try:
+        injector = Injector(Bindings())
+        injector.get(Coconut)
+        injector.get(Coconut)
+        injector.get(Coconut, {"name": "Bob"})
+    finally:
+        zuice.reflect.has_no_arg_constructor = original_has_no_arg_constructor
+    
+    assert_equal([Coconut], calls)
+
+
+def test_repeated_lookups_of_missing_keys_raise_exception_each_time():
+    injector = Injector(Bindings())
+    assert_raises(NoSuchBindingException, lambda: injector.get("apple"))
+    assert_raises(NoSuchBindingException, lambda: injector.get("apple"))
+
+
+def test_scope_values_are_preferred_to_cached_resolution():
+    injector = Injector(Bindings())
+    assert_raises(NoSuchBindingException, lambda: injector.get("apple"))
+    assert_equal("Bob", injector.get("apple", {"apple": "Bob"}))
+
+
 def test_can_bind_to_names():
     apple_to_inject = Apple()
     bindings = Bindings()
@@ -214,6 +295,17 @@ def test_can_set_bindings_for_keys_in_call_to_get():
     assert_equal("Bob", injector.get(Name, {Name: "Bob"}))
     
 
+def test_keys_with_the_same_name_are_the_same_key():
+    assert zuice.key("Name") is zuice.key("Name")
+    assert zuice.key("Name") is not zuice.key("Greeting")
+    
+
+def test_copied_keys_are_the_same_key():
+    Name = zuice.key("Name")
+    assert copy.copy(Name) is Name
+    assert pickle.loads(pickle.dumps(Name)) is Name
+    
+
 def test_unscoped_injectables_are_available_in_any_scope():
     Greeting = zuice.key("Greeting")
     Name = zuice.key("Name")
@@ -382,6 +474,65 @@ class TestLifetimes(object):
         
         assert_equal(1, injector.get(Counter, {"name": "Bob"}).x)
         assert_equal(1, injector.get(Counter, {"name": "Jim"}).x)
+    
+    def test_weak_scopes_release_cached_values_when_scope_values_are_collected(self):
+        class Request(object):
+            pass
+        
+        RequestKey = zuice.key("Request")
+        counter = zuice.key("counter")
+        bindings = Bindings()
+        with bindings.scope(RequestKey) as scope_bindings:
+            scope_bindings.bind(counter).to_provider(lambda injector: [])
+        
+        injector = Injector(bindings, weak_scopes=True)
+        request = Request()
+        value = injector.get(counter, {RequestKey: request})
+        assert injector.get(counter, {RequestKey: request}) is value
+        assert_equal(1, sum(key_stats.entries for key_stats in injector.cache_stats()))
+        
+        del request
+        gc.collect()
+        assert_equal(0, sum(key_stats.entries for key_stats in injector.cache_stats()))
+    
+    def test_weak_scopes_compare_scope_values_by_equality(self):
+        class Request(object):
+            def __init__(self, path):
+                self.path = path
+            
+            def __eq__(self, other):
+                return isinstance(other, Request) and self.path == other.path
+            
+            def __ne__(self, other):
+                return not (self == other)
+            
+            def __hash__(self):
+                return hash(self.path)
+        
+        RequestKey = zuice.key("Request")
+        counter = zuice.key("counter")
+        bindings = Bindings()
+        with bindings.scope(RequestKey) as scope_bindings:
+            scope_bindings.bind(counter).to_provider(lambda injector: [])
+        
+        injector = Injector(bindings, weak_scopes=True)
+        first = Request("/")
+        value = injector.get(counter, {RequestKey: first})
+        
+        assert injector.get(counter, {RequestKey: Request("/")}) is value
+        assert injector.get(counter, {RequestKey: Request("/about")}) is not value
+    
+    def test_weak_scopes_cache_values_for_scope_values_that_cannot_be_weakly_referenced(self):
+        Name = zuice.key("Name")
+        counter = zuice.key("counter")
+        bindings = Bindings()
+        with bindings.scope(Name) as scope_bindings:
+            scope_bindings.bind(counter).to_provider(lambda injector: [])
+        
+        injector = Injector(bindings, weak_scopes=True)
+        value = injector.get(counter, {Name: "Bob"})
+        assert injector.get(counter, {Name: "Bob"}) is value
+        assert injector.get(counter, {Name: "Jim"}) is not value
 
     
 def test_methods_decorated_with_init_decorator_are_run_after_injection():
@@ -401,3 +552,767 @@ def test_methods_decorated_with_init_decorator_are_run_after_manual_construction
             self.x = 1
     
     assert_equal(1, Count().x)
+
+
+class TestMultibindings(object):
+    def test_set_multibinding_returns_all_added_elements_in_order(self):
+        apple = Apple()
+        banana = Banana()
+        
+        bindings = Bindings()
+        fruits = bindings.multibind(zuice.SetOf("fruit"))
+        fruits.add().to_instance(apple)
+        fruits.add().to_instance(banana)
+        
+        injector = Injector(bindings)
+        assert_equal((apple, banana), injector.get(zuice.SetOf("fruit")))
+    
+    def test_set_multibinding_with_no_elements_is_empty(self):
+        bindings = Bindings()
+        bindings.multibind(zuice.SetOf("fruit"))
+        
+        injector = Injector(bindings)
+        assert_equal((), injector.get(zuice.SetOf("fruit")))
+    
+    def test_map_multibinding_returns_elements_by_entry(self):
+        bindings = Bindings()
+        fruits = bindings.multibind(zuice.MapOf("fruit"))
+        fruits.add("apple").to_type(Apple)
+        fruits.add("banana").to_type(Banana)
+        
+        injector = Injector(bindings)
+        fruit = injector.get(zuice.MapOf("fruit"))
+        assert_equal(["apple", "banana"], sorted(fruit.keys()))
+        assert isinstance(fruit["apple"], Apple)
+        assert isinstance(fruit["banana"], Banana)
+    
+    def test_map_multibinding_cannot_bind_same_entry_more_than_once(self):
+        bindings = Bindings()
+        fruits = bindings.multibind(zuice.MapOf("fruit"))
+        fruits.add("apple").to_type(Apple)
+        assert_raises(zuice.bindings.AlreadyBoundException, lambda: fruits.add("apple"))
+    
+    def test_multibindings_from_separate_bindings_are_merged_on_update(self):
+        bindings = Bindings()
+        bindings.multibind(zuice.SetOf("fruit")).add().to_type(Apple)
+        other_bindings = Bindings()
+        other_bindings.multibind(zuice.SetOf("fruit")).add().to_type(Banana)
+        bindings.update(other_bindings)
+        
+        injector = Injector(bindings)
+        fruit = injector.get(zuice.SetOf("fruit"))
+        assert_equal([Apple, Banana], [type(value) for value in fruit])
+    
+    def test_singleton_multibinding_caches_whole_collection(self):
+        bindings = Bindings()
+        bindings.multibind(zuice.SetOf("fruit")).singleton().add().to_type(Apple)
+        
+        injector = Injector(bindings)
+        assert injector.get(zuice.SetOf("fruit")) is injector.get(zuice.SetOf("fruit"))
+    
+    def test_elements_can_be_constructed_using_executor(self):
+        class Future(object):
+            def __init__(self, value):
+                self._value = value
+            
+            def cancel(self):
+                return False
+            
+            def result(self):
+                return self._value
+        
+        class Executor(object):
+            calls = 0
+            
+            def submit(self, func, *args):
+                self.calls += 1
+                return Future(func(*args))
+        
+        executor = Executor()
+        bindings = Bindings()
+        fruits = bindings.multibind(zuice.SetOf("fruit")).parallel(executor)
+        fruits.add().to_type(Apple)
+        fruits.add().to_type(Banana)
+        
+        injector = Injector(bindings)
+        apple, banana = injector.get(zuice.SetOf("fruit"))
+        assert isinstance(apple, Apple)
+        assert isinstance(banana, Banana)
+        assert_equal(1, executor.calls)
+
+
+class TestFreeze(object):
+    def test_frozen_injector_returns_same_singleton_as_original_injector(self):
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        injector = Injector(bindings)
+        apple = injector.get(Apple)
+        
+        frozen = injector.freeze()
+        assert frozen.get(Apple) is apple
+        assert frozen.get(Apple) is apple
+    
+    def test_frozen_injector_constructs_singletons_once(self):
+        x = [0]
+        class Counter(object):
+            def __init__(self):
+               self.x = x[0] = x[0] + 1
+        
+        class Holder(Base):
+            _counter = dependency(Counter)
+        
+        bindings = Bindings()
+        bindings.bind(Counter).singleton()
+        frozen = Injector(bindings).freeze()
+        
+        assert_equal(1, frozen.get(Counter).x)
+        assert_equal(1, frozen.get(Holder)._counter.x)
+        assert_equal(1, frozen.get(Holder, {"name": "Bob"})._counter.x)
+        assert_equal(1, x[0])
+    
+    def test_eagerly_frozen_injector_constructs_singletons_when_frozen(self):
+        x = [0]
+        class Counter(object):
+            def __init__(self):
+               self.x = x[0] = x[0] + 1
+        
+        bindings = Bindings()
+        bindings.bind(Counter).singleton()
+        frozen = Injector(bindings).freeze(eager=True)
+        
+        assert_equal(1, x[0])
+        assert_equal(1, frozen.get(Counter).x)
+    
+    def test_warm_lookups_of_singletons_by_frozen_injector_skip_cache(self):
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        frozen = Injector(bindings).freeze()
+        apple = frozen.get(Apple)
+        
+        original_get = zuice._Cache.get
+        def get(*args):
+            raise AssertionError("cache was used")
+        
+        zuice._Cache.get = get
+        try:
+            assert frozen.get(Apple) is apple
+        finally:
+            zuice._Cache.get = original_get
+        assert_equal({Apple: apple}, frozen._singletons)
+    
+    def test_eagerly_frozen_injector_stores_singletons_in_table(self):
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        frozen = Injector(bindings).freeze(eager=True)
+        
+        assert_equal([Apple], list(frozen._singletons))
+    
+    def test_frozen_injector_prefers_scope_values_to_singletons(self):
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        frozen = Injector(bindings).freeze()
+        frozen.get(Apple)
+        
+        apple = Apple()
+        assert frozen.get(Apple, {Apple: apple}) is apple
+    
+    def test_frozen_injector_is_bound_to_injector(self):
+        frozen = Injector(Bindings()).freeze()
+        assert frozen.get(Injector) is frozen
+
+
+class TestPlans(object):
+    def test_repeated_lookups_of_the_same_shape_use_cached_values(self):
+        Request = zuice.key("Request")
+        
+        class Session(Base):
+            _request = dependency(Request)
+            _apple = dependency(Apple)
+        
+        class Handler(Base):
+            _session = dependency(Session)
+            _user = dependency("user")
+        
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        with bindings.scope(Request) as scope_bindings:
+            scope_bindings.bind("user").to_provider(lambda injector: [injector.get(Request)])
+        injector = Injector(bindings)
+        
+        first = injector.get(Handler, {Request: "first"})
+        second = injector.get(Handler, {Request: "first"})
+        third = injector.get(Handler, {Request: "third"})
+        
+        assert first is not second
+        assert first._user is second._user
+        assert_equal(["third"], third._user)
+        assert_equal("third", third._session._request)
+        assert first._session._apple is third._session._apple
+    
+    def test_factories_of_the_same_key_share_a_plan(self):
+        injector = Injector(Bindings())
+        for index in range(10):
+            injector.get(zuice.factory(Apple))
+        
+        assert_equal(1, sum(len(plans) for plans in injector._state.plans.values()))
+        assert zuice.factory(Apple) == zuice.factory(Apple)
+        assert zuice.factory(Apple) != zuice.factory(Banana)
+    
+    def test_warm_lookups_of_singletons_and_scope_values_skip_plan_context(self):
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        injector = Injector(bindings)
+        apple = injector.get(Apple)
+        injector.get("name", {"name": "Bob"})
+        
+        original_init = zuice._PlanContext.__init__
+        def init(*args):
+            raise AssertionError("plan context was created")
+        
+        zuice._PlanContext.__init__ = init
+        try:
+            assert injector.get(Apple) is apple
+            assert_equal("Jim", injector.get("name", {"name": "Jim"}))
+        finally:
+            zuice._PlanContext.__init__ = original_init
+    
+    def test_dispatch_is_skipped_for_repeated_lookups(self):
+        class Handler(Base):
+            _apple = dependency(Apple)
+            _name = dependency("name")
+        
+        injector = Injector(Bindings())
+        injector.get(Handler, {"name": "Bob"})
+        
+        calls = []
+        original_resolver = Injector._resolver
+        
+        def resolver(self, key):
+            calls.append(key)
+            return original_resolver(self, key)
+        
+        Injector._resolver = resolver
+        try:
+            handler = injector.get(Handler, {"name": "Jim"})
+        finally:
+            Injector._resolver = original_resolver
+        
+        assert_equal([], calls)
+        assert_equal("Jim", handler._name)
+    
+    def test_providers_are_passed_injector_with_instances(self):
+        bindings = Bindings()
+        bindings.bind("greeting").to_provider(lambda injector: "Hello " + injector.get("name"))
+        injector = Injector(bindings)
+        
+        assert_equal("Hello Bob", injector.get("greeting", {"name": "Bob"}))
+        assert_equal("Hello Jim", injector.get("greeting", {"name": "Jim"}))
+    
+    def test_lookups_that_cannot_be_planned_raise_exception_each_time(self):
+        class Handler(Base):
+            _name = dependency("name")
+        
+        injector = Injector(Bindings())
+        assert_raises(NoSuchBindingException, lambda: injector.get(Handler))
+        assert_raises(NoSuchBindingException, lambda: injector.get(Handler))
+        assert_equal("Bob", injector.get(Handler, {"name": "Bob"})._name)
+
+
+class TestNestedScopes(object):
+    def _bindings(self):
+        Session = zuice.key("Session")
+        Request = zuice.key("Request")
+        
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        with bindings.scope(Session) as session_bindings:
+            session_bindings.bind("cart").to_provider(lambda injector: [injector.get(Session)])
+        with bindings.scope(Request) as request_bindings:
+            request_bindings.bind("page").to_provider(lambda injector: [injector.get(Request), injector.get("cart")])
+        return Session, Request, bindings
+    
+    def test_values_scoped_to_outer_level_are_shared_by_inner_levels(self):
+        Session, Request, bindings = self._bindings()
+        injector = Injector(bindings)
+        
+        with injector.enter({Session: "session"}) as session_injector:
+            with session_injector.enter({Request: "first"}) as request_injector:
+                first_page = request_injector.get("page")
+                assert request_injector.get("page") is first_page
+            with session_injector.enter({Request: "second"}) as request_injector:
+                second_page = request_injector.get("page")
+        
+        assert_equal("first", first_page[0])
+        assert_equal("second", second_page[0])
+        assert first_page[1] is second_page[1]
+        assert_equal(["session"], first_page[1])
+    
+    def test_values_are_dropped_when_level_ends(self):
+        Session, Request, bindings = self._bindings()
+        injector = Injector(bindings)
+        
+        session_injector = injector.enter({Session: "session"})
+        request_injector = session_injector.enter({Request: "request"})
+        page = request_injector.get("page")
+        cart = session_injector.get("cart")
+        
+        request_injector.close()
+        assert request_injector.get("page") is not page
+        assert session_injector.get("cart") is cart
+        
+        session_injector.close()
+        assert session_injector.get("cart") is not cart
+    
+    def test_singletons_are_shared_by_all_levels(self):
+        Session, Request, bindings = self._bindings()
+        injector = Injector(bindings)
+        
+        with injector.enter({Session: "first"}) as session_injector:
+            first_apple = session_injector.enter({Request: "request"}).get(Apple)
+        with injector.enter({Session: "second"}) as session_injector:
+            second_apple = session_injector.get(Apple)
+        
+        assert first_apple is second_apple
+        assert injector.get(Apple) is first_apple
+    
+    def test_levels_can_be_combined_with_instances(self):
+        Session, Request, bindings = self._bindings()
+        injector = Injector(bindings)
+        
+        with injector.enter({Session: "session"}) as session_injector:
+            cart = session_injector.get("cart", {Request: "first"})
+            assert session_injector.get("cart") is cart
+            assert session_injector.get("cart", {Request: "second"}) is cart
+    
+    def test_instances_override_values_of_levels(self):
+        Request = zuice.key("Request")
+        bindings = Bindings()
+        with bindings.scope(Request) as request_bindings:
+            request_bindings.bind("handler").to_provider(lambda injector: [injector.get(Request)])
+        injector = Injector(bindings)
+        first, second = object(), object()
+        
+        with injector.enter({Request: first}) as request_injector:
+            first_handler = request_injector.get("handler")
+            second_handler = request_injector.get("handler", {Request: second})
+            
+            assert second_handler[0] is second
+            assert request_injector.get("handler", {Request: second}) is second_handler
+            assert request_injector.get("handler") is first_handler
+            assert first_handler[0] is first
+
+
+class _CancellableExecutor(object):
+    def __init__(self, executor):
+        self._executor = executor
+        self._futures = []
+    
+    def submit(self, *args):
+        future = self._executor.submit(*args)
+        self._futures.append(future)
+        return future
+    
+    def cancel(self):
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=False)
+
+
+class TestParallelResolution(object):
+    def _futures(self):
+        try:
+            import concurrent.futures
+        except ImportError:
+            raise SkipTest("concurrent.futures is not available")
+        return concurrent.futures
+    
+    def _get_in_thread(self, get, executor):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(get()))
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        executor.cancel()
+        thread.join()
+        return result
+    
+    def test_nested_parallel_multibindings_can_share_one_worker(self):
+        bindings = Bindings()
+        executor = _CancellableExecutor(self._futures().ThreadPoolExecutor(1))
+        inner = bindings.multibind(zuice.SetOf("inner")).parallel(executor)
+        inner.add().to_type(Apple)
+        inner.add().to_type(Banana)
+        outer = bindings.multibind(zuice.SetOf("outer")).parallel(executor)
+        outer.add().to_key(zuice.SetOf("inner"))
+        outer.add().to_type(Apple)
+        
+        result = self._get_in_thread(lambda: Injector(bindings).get(zuice.SetOf("outer")), executor)
+        
+        assert_equal(1, len(result))
+        assert_equal(2, len(result[0][0]))
+    
+    def test_callers_resolve_queued_dependencies_while_workers_are_blocked(self):
+        class Left(object):
+            pass
+        
+        class Right(object):
+            pass
+        
+        class Inner(Base):
+            _left = dependency(Left)
+            _right = dependency(Right)
+        
+        class Outer(Base):
+            _a = dependency("a")
+            _b = dependency("b")
+        
+        a_started = threading.Event()
+        b_started = threading.Event()
+        
+        def provide_a(injector):
+            a_started.set()
+            b_started.wait(5)
+            return injector.get(Inner)
+        
+        def provide_b(injector):
+            b_started.set()
+            a_started.wait(5)
+            return injector.get("a")
+        
+        bindings = Bindings()
+        bindings.bind("a").to_provider(provide_a).singleton()
+        bindings.bind("b").to_provider(provide_b)
+        
+        executor = _CancellableExecutor(self._futures().ThreadPoolExecutor(1))
+        injector = Injector(bindings, executor=executor)
+        result = self._get_in_thread(lambda: injector.get(Outer), executor)
+        
+        assert_equal(1, len(result))
+        assert result[0]._a is result[0]._b
+    
+    def test_dependencies_of_parallel_classes_are_resolved_concurrently(self):
+        futures = self._futures()
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def wait_for_other(injector):
+            barrier.wait()
+            return threading.current_thread()
+        
+        bindings = Bindings()
+        bindings.bind("first").to_provider(wait_for_other)
+        bindings.bind("second").to_provider(wait_for_other)
+        
+        with futures.ThreadPoolExecutor(2) as executor:
+            @zuice.parallel(executor)
+            class Pair(Base):
+                _first = dependency("first")
+                _second = dependency("second")
+            
+            pair = Injector(bindings).get(Pair)
+        
+        assert pair._first is not pair._second
+    
+    def test_injector_executor_resolves_dependencies_concurrently_before_init(self):
+        futures = self._futures()
+        barrier = threading.Barrier(2, timeout=5)
+        
+        def wait_for_other(injector):
+            barrier.wait()
+            return "value"
+        
+        class Pair(Base):
+            _first = dependency("first")
+            _second = dependency("second")
+            
+            @zuice.init
+            def start(self):
+                self.values = [self._first, self._second]
+        
+        bindings = Bindings()
+        bindings.bind("first").to_provider(wait_for_other)
+        bindings.bind("second").to_provider(wait_for_other)
+        
+        with futures.ThreadPoolExecutor(2) as executor:
+            injector = Injector(bindings, executor=executor)
+            assert_equal(["value", "value"], injector.get(Pair).values)
+            barrier.reset()
+            assert_equal(["value", "value"], injector.get(Pair).values)
+    
+    def test_singletons_shared_by_parallel_dependencies_are_constructed_once(self):
+        futures = self._futures()
+        constructed = []
+        constructing = threading.Event()
+        requested = threading.Event()
+        
+        class Slow(object):
+            def __init__(self):
+                constructed.append(self)
+                constructing.set()
+                requested.wait(5)
+        
+        def wait_for_construction(injector):
+            constructing.wait(5)
+            requested.set()
+        
+        class First(Base):
+            _slow = dependency(Slow)
+        
+        class Second(Base):
+            _ready = dependency("ready")
+            _slow = dependency(Slow)
+        
+        class Pair(Base):
+            _first = dependency(First)
+            _second = dependency(Second)
+        
+        bindings = Bindings()
+        bindings.bind(Slow).singleton()
+        bindings.bind("ready").to_provider(wait_for_construction)
+        
+        with futures.ThreadPoolExecutor(2) as executor:
+            pair = Injector(bindings, executor=executor).get(Pair)
+        
+        assert_equal(1, len(constructed))
+        assert pair._first._slow is pair._second._slow
+
+
+class TestRebind(object):
+    def test_rebound_key_is_provided_by_new_provider(self):
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        injector = Injector(bindings)
+        assert_equal("Bob", injector.get("name"))
+        
+        injector.rebind("name", lambda injector: "Jim")
+        
+        assert_equal("Jim", injector.get("name"))
+        assert_equal("Bob", Injector(bindings).get("name"))
+    
+    def test_singletons_that_depend_on_rebound_key_are_rebuilt(self):
+        class Greeting(Base):
+            _name = dependency("name")
+        
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        bindings.bind(Greeting).singleton()
+        bindings.bind("loud").to_provider(lambda injector: injector.get(Greeting)._name.upper()).singleton()
+        injector = Injector(bindings)
+        assert_equal("BOB", injector.get("loud"))
+        
+        injector.rebind("name", lambda injector: "Jim")
+        
+        assert_equal("Jim", injector.get(Greeting)._name)
+        assert_equal("JIM", injector.get("loud"))
+    
+    def test_singletons_that_do_not_depend_on_rebound_key_are_kept(self):
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        bindings.bind(Apple).singleton()
+        bindings.bind("greeting").to_provider(lambda injector: [injector.get("name")]).singleton()
+        injector = Injector(bindings)
+        apple = injector.get(Apple)
+        greeting = injector.get("greeting")
+        
+        injector.rebind("name", lambda injector: "Jim")
+        
+        assert injector.get(Apple) is apple
+        assert injector.get("greeting") is not greeting
+        assert_equal(["Jim"], injector.get("greeting"))
+    
+    def test_rebinding_keeps_the_scope_of_the_original_binding(self):
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        bindings.bind("names").to_provider(lambda injector: [injector.get("name")]).singleton()
+        injector = Injector(bindings)
+        
+        injector.rebind("names", lambda injector: [injector.get("name"), "Jim"])
+        
+        assert injector.get("names") is injector.get("names")
+        assert_equal(["Bob", "Jim"], injector.get("names"))
+    
+    def test_values_cached_in_levels_are_invalidated(self):
+        Request = zuice.key("Request")
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        with bindings.scope(Request) as request_bindings:
+            request_bindings.bind("page").to_provider(lambda injector: [injector.get("name")])
+            request_bindings.bind("id").to_provider(lambda injector: [injector.get(Request)])
+        injector = Injector(bindings)
+        
+        with injector.enter({Request: "request"}) as request_injector:
+            page_id = request_injector.get("id")
+            request_injector.get("page")
+            injector.rebind("name", lambda injector: "Jim")
+            
+            assert_equal(["Jim"], request_injector.get("page"))
+            assert request_injector.get("id") is page_id
+    
+    def test_singletons_that_depend_on_rebound_key_through_unscoped_bindings_are_rebuilt(self):
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        bindings.bind("greeting").to_provider(lambda injector: "Hello " + injector.get("name"))
+        bindings.bind("loud").to_provider(lambda injector: injector.get("greeting").upper()).singleton()
+        injector = Injector(bindings)
+        assert_equal("HELLO BOB", injector.get("loud"))
+        
+        injector.rebind("name", lambda injector: "Jim")
+        
+        assert_equal("HELLO JIM", injector.get("loud"))
+    
+    def test_injectors_with_frozen_injectors_cannot_be_rebound(self):
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        injector = Injector(bindings)
+        frozen = injector.freeze()
+        
+        assert_raises(TypeError, lambda: injector.rebind("name", lambda injector: "Jim"))
+        assert_equal("Bob", frozen.get("name"))
+        
+        del frozen
+        gc.collect()
+        injector.rebind("name", lambda injector: "Jim")
+        assert_equal("Jim", injector.get("name"))
+    
+    def test_frozen_injectors_cannot_be_rebound(self):
+        bindings = Bindings()
+        bindings.bind("name").to_instance("Bob")
+        injector = Injector(bindings).freeze()
+        
+        assert_raises(TypeError, lambda: injector.rebind("name", lambda injector: "Jim"))
+
+
+class TestMemoized(object):
+    def _bindings(self):
+        bindings = Bindings()
+        bindings.bind("template").to_provider(lambda injector: [injector.get("source")]).memoized(maxsize=2)
+        return bindings
+    
+    def test_memoized_value_is_reused_while_dependencies_are_unchanged(self):
+        bindings = self._bindings()
+        bindings.bind("source").to_instance("Hello")
+        injector = Injector(bindings)
+        
+        template = injector.get("template")
+        
+        assert injector.get("template") is template
+        assert_equal(["Hello"], template)
+    
+    def test_memoized_value_is_rebuilt_when_dependencies_change(self):
+        Source = zuice.key("Source")
+        bindings = Bindings()
+        bindings.bind("template").to_provider(lambda injector: [injector.get(Source)]).memoized(maxsize=2)
+        injector = Injector(bindings)
+        first, second = object(), object()
+        
+        first_template = injector.get("template", {Source: first})
+        second_template = injector.get("template", {Source: second})
+        
+        assert first_template is not second_template
+        assert injector.get("template", {Source: first}) is first_template
+        assert injector.get("template", {Source: second}) is second_template
+    
+    def test_least_recently_used_values_are_evicted(self):
+        Source = zuice.key("Source")
+        bindings = Bindings()
+        bindings.bind("template").to_provider(lambda injector: [injector.get(Source)]).memoized(maxsize=2)
+        injector = Injector(bindings)
+        sources = [object(), object(), object()]
+        
+        templates = [injector.get("template", {Source: source}) for source in sources]
+        
+        assert injector.get("template", {Source: sources[2]}) is templates[2]
+        assert injector.get("template", {Source: sources[1]}) is templates[1]
+        assert injector.get("template", {Source: sources[0]}) is not templates[0]
+    
+    def test_memo_stats_count_hits_and_misses(self):
+        bindings = self._bindings()
+        bindings.bind("source").to_instance("Hello")
+        injector = Injector(bindings)
+        
+        injector.get("template")
+        injector.get("template")
+        injector.get("template")
+        
+        stats = injector.memo_stats()
+        assert_equal(1, len(stats))
+        assert_equal(("template", 1, 2, 2, 1), tuple(stats[0]))
+    
+    def test_memoized_types_are_not_singletons(self):
+        bindings = Bindings()
+        bindings.bind(Apple).memoized()
+        injector = Injector(bindings)
+        
+        assert injector.get(Apple) is injector.get(Apple)
+        assert_equal([], injector.cache_stats())
+        assert_equal(1, injector.memo_stats()[0].hits)
+    
+    def test_memoized_types_are_rebuilt_when_their_dependencies_change(self):
+        class Handler(Base):
+            _source = dependency("source")
+        
+        bindings = Bindings()
+        bindings.bind("source").to_provider(lambda injector: object())
+        bindings.bind(Handler).memoized()
+        injector = Injector(bindings)
+        
+        first = injector.get(Handler)
+        second = injector.get(Handler)
+        
+        assert first is not second
+        assert first._source is not second._source
+    
+    def test_dependencies_are_resolved_once_per_lookup(self):
+        resolved = []
+        bindings = Bindings()
+        bindings.bind("source").to_provider(lambda injector: resolved.append(object()) or resolved[-1])
+        bindings.bind("template").to_provider(lambda injector: [injector.get("source")]).memoized()
+        injector = Injector(bindings)
+        
+        first = injector.get("template")
+        second = injector.get("template")
+        
+        assert_equal(2, len(resolved))
+        assert first[0] is resolved[0]
+        assert second[0] is resolved[1]
+    
+    def test_memoized_values_are_not_shared_between_injectors(self):
+        bindings = self._bindings()
+        bindings.bind("source").to_instance("Hello")
+        
+        assert Injector(bindings).get("template") is not Injector(bindings).get("template")
+
+
+class TestAllocations(object):
+    def _allocated_by_warm_get(self, get):
+        import tracemalloc
+        
+        get()
+        get()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            get()
+            return tracemalloc.get_traced_memory()[1] - before
+        finally:
+            tracemalloc.stop()
+    
+    def _injector(self):
+        Name = zuice.key("Name")
+        bindings = Bindings()
+        bindings.bind(Apple).singleton()
+        with bindings.scope(Name) as scope_bindings:
+            scope_bindings.bind("greeting").to_provider(lambda injector: "Hello " + injector.get(Name))
+        return Name, Injector(bindings)
+    
+    def test_warm_get_of_singleton_allocates_almost_nothing(self):
+        Name, injector = self._injector()
+        
+        assert self._allocated_by_warm_get(lambda: injector.get(Apple)) < 256
+    
+    def test_warm_get_of_scoped_value_allocates_a_bounded_amount(self):
+        Name, injector = self._injector()
+        level_injector = injector.enter({Name: "Bob"})
+        
+        assert self._allocated_by_warm_get(lambda: injector.get("greeting", {Name: "Bob"})) < 1536
+        assert self._allocated_by_warm_get(lambda: level_injector.get("greeting")) < 640
@@ -0,0 +1,131 @@
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+
+from nose.tools import assert_equal
+
+import zuice
+import zuice.metadata
+from zuice import Bindings
+from zuice import Injector
+
+
+_module_source = """
+import zuice
+
+class Apple(object):
+    pass
+
+class Juicer(object):
+    def __init__(self):
+        pass
+
+@zuice.inject
+class Basket(zuice.Base):
+    _apple = zuice.dependency(Apple)
+    _name = zuice.dependency(zuice.key("name"))
+    _juicer: Juicer
+    
+    @zuice.init
+    def start(self):
+        self.started = True
+"""
+
+
+def test_class_metadata_is_loaded_from_cache_instead_of_introspecting():
+    with _fruit_module() as (cache_path, module_path):
+        zuice.metadata.load(cache_path)
+        _get_basket()
+        zuice.metadata.save(cache_path)
+        
+        _start_new_process()
+        zuice.metadata.load(cache_path)
+        calls = _count_introspection(_get_basket)
+        
+        assert_equal([], calls)
+
+
+def test_cache_is_ignored_when_module_has_changed():
+    with _fruit_module() as (cache_path, module_path):
+        zuice.metadata.load(cache_path)
+        _get_basket()
+        zuice.metadata.save(cache_path)
+        
+        _start_new_process()
+        with open(module_path, "a") as module_file:
+            module_file.write("\n# changed\n")
+        zuice.metadata.load(cache_path)
+        calls = _count_introspection(_get_basket)
+        
+        assert_equal(["Apple", "Basket", "Juicer"], sorted(calls))
+
+
+def test_invalid_cache_is_ignored():
+    with _fruit_module() as (cache_path, module_path):
+        with open(cache_path, "w") as cache_file:
+            cache_file.write("{")
+        zuice.metadata.load(cache_path)
+        _get_basket()
+
+
+@contextlib.contextmanager
+def _fruit_module():
+    directory = tempfile.mkdtemp()
+    module_path = os.path.join(directory, "zuice_metadata_fruit.py")
+    with open(module_path, "w") as module_file:
+        module_file.write(_module_source)
+    sys.path.insert(0, directory)
+    _reset_metadata()
+    try:
+        yield os.path.join(directory, "zuice-cache.json"), module_path
+    finally:
+        sys.path.remove(directory)
+        sys.modules.pop("zuice_metadata_fruit", None)
+        shutil.rmtree(directory)
+        _reset_metadata()
+        zuice.metadata._enabled = False
+
+
+def _get_basket():
+    import zuice_metadata_fruit
+    basket = Injector(Bindings()).get(zuice_metadata_fruit.Basket, {zuice.key("name"): "Bob"})
+    assert isinstance(basket._apple, zuice_metadata_fruit.Apple)
+    assert isinstance(basket._juicer, zuice_metadata_fruit.Juicer)
+    assert_equal("Bob", basket._name)
+    assert basket.started
+
+
+def _start_new_process():
+    sys.modules.pop("zuice_metadata_fruit", None)
+    _reset_metadata()
+
+
+def _reset_metadata():
+    zuice.metadata._loaded.clear()
+    zuice.metadata._recorded.clear()
+    zuice.metadata._module_stamps.clear()
+
+
+def _count_introspection(func):
+    calls = []
+    original_read_base_spec = zuice._read_base_spec
+    original_has_no_arg_constructor = zuice.reflect.has_no_arg_constructor
+    
+    def read_base_spec(cls):
+        calls.append(cls.__name__)
+        return original_read_base_spec(cls)
+    
+    def has_no_arg_constructor(cls):
+        calls.append(cls.__name__)
+        return original_has_no_arg_constructor(cls)
+    
+    zuice._read_base_spec = read_base_spec
+    zuice.reflect.has_no_arg_constructor = has_no_arg_constructor
+    try:
+        func()
+    finally:
+        zuice._read_base_spec = original_read_base_spec
+        zuice.reflect.has_no_arg_constructor = original_has_no_arg_constructor
+    return calls
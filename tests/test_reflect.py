@@ -22,3 +22,13 @@ def test_class_constructor_with_args_is_not_recognised_as_no_arg_constructor():
             pass
 
     assert not zuice.reflect.has_no_arg_constructor(SampleObject)
+
+
+def test_import_path_imports_attribute_of_module():
+    import collections
+    assert zuice.reflect.import_path("collections:OrderedDict") is collections.OrderedDict
+
+
+def test_import_path_can_refer_to_nested_attributes():
+    import collections
+    assert zuice.reflect.import_path("collections:OrderedDict.fromkeys") == collections.OrderedDict.fromkeys
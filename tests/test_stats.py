@@ -0,0 +1,101 @@
+import threading
+
+from nose.tools import assert_equal
+
+import zuice
+from zuice import Bindings
+from zuice import Injector
+import zuice.stats
+
+
+def test_cache_stats_count_entries_hits_and_misses_per_key_and_scope():
+    Name = zuice.key("Name")
+    greeting = zuice.key("greeting")
+    counter = zuice.key("counter")
+    
+    bindings = Bindings()
+    bindings.bind(counter).to_instance([]).singleton()
+    with bindings.scope(Name) as scope_bindings:
+        scope_bindings.bind(greeting).to_provider(lambda injector: "Hello " + injector.get(Name))
+    
+    injector = Injector(bindings)
+    injector.get(counter)
+    injector.get(counter)
+    injector.get(greeting, {Name: "Bob"})
+    injector.get(greeting, {Name: "Bob"})
+    injector.get(greeting, {Name: "Jim"})
+    
+    stats = dict((key_stats.key, key_stats) for key_stats in injector.cache_stats())
+    
+    assert_equal(frozenset(), stats[counter].scope_keys)
+    assert_equal((1, 1, 1), (stats[counter].entries, stats[counter].hits, stats[counter].misses))
+    assert_equal(frozenset([Name]), stats[greeting].scope_keys)
+    assert_equal((2, 1, 2), (stats[greeting].entries, stats[greeting].hits, stats[greeting].misses))
+    assert stats[greeting].size > 0
+    assert_equal(None, stats[greeting].allocated)
+
+
+def test_cache_stats_include_values_cached_in_levels():
+    Request = zuice.key("Request")
+    page = zuice.key("page")
+    
+    bindings = Bindings()
+    with bindings.scope(Request) as scope_bindings:
+        scope_bindings.bind(page).to_provider(lambda injector: [injector.get(Request)])
+    
+    injector = Injector(bindings)
+    level_injector = injector.enter({Request: "request"})
+    level_injector.get(page)
+    level_injector.get(page)
+    
+    stats = injector.cache_stats()
+    
+    assert_equal(1, len(stats))
+    assert_equal((page, frozenset([Request])), (stats[0].key, stats[0].scope_keys))
+    assert_equal((1, 1, 1), (stats[0].entries, stats[0].hits, stats[0].misses))
+
+
+def test_cache_stats_include_allocations_when_tracemalloc_is_tracing():
+    import tracemalloc
+    
+    counter = zuice.key("counter")
+    bindings = Bindings()
+    bindings.bind(counter).to_provider(lambda injector: [0] * 1000).singleton()
+    injector = Injector(bindings)
+    
+    tracemalloc.start()
+    try:
+        injector.get(counter)
+    finally:
+        tracemalloc.stop()
+    
+    key_stats, = injector.cache_stats()
+    assert key_stats.allocated >= 8000
+
+
+def test_formatted_cache_stats_are_grouped_by_scope():
+    counter = zuice.key("counter")
+    bindings = Bindings()
+    bindings.bind(counter).to_instance([]).singleton()
+    injector = Injector(bindings)
+    injector.get(counter)
+    
+    lines = zuice.stats.format_cache_stats(injector.cache_stats()).split("\n")
+    
+    assert lines[0].startswith("singleton: 1 entries, 0 hits, 1 misses")
+    assert lines[1].startswith("    Key('counter'): 1 entries")
+
+
+def test_cache_stats_can_be_dumped_periodically():
+    dumped = threading.Event()
+    messages = []
+    
+    def log(message):
+        messages.append(message)
+        dumped.set()
+    
+    dump = zuice.stats.dump_periodically(Injector(Bindings()), 0.01, log=log)
+    dumped.wait(5)
+    dump.stop()
+    
+    assert_equal("", messages[0])
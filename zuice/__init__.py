@@ -1,20 +1,133 @@
+import collections
+import functools
 import itertools
+import sys
+import weakref
 
+import zuice.metadata
 import zuice.reflect
-from .bindings import Bindings
+import zuice.stats
+from .bindings import Bindings, SetOf, MapOf, Module, compose, _Binding, _MemoizedProvider
 
-__all__ = ['Bindings', 'Injector', 'Base', 'dependency']
+__all__ = ['Bindings', 'Injector', 'Base', 'dependency', 'SetOf', 'MapOf', 'Module', 'compose']
+
+
+class _Cache(object):
+    def __init__(self, weak=False):
+        import threading
+        
+        self.values = {}
+        self.hits = {}
+        self.misses = {}
+        self.allocated = {}
+        self._weak = weak
+        self._weak_tokens = weakref.WeakKeyDictionary()
+        self._references = {}
+        self._lock = threading.Lock()
+        self._new_key_lock = threading.RLock
+        self._key_locks = {}
+    
+    def active_key(self, active_values):
+        if self._weak:
+            return frozenset(
+                (key, self._weak_token(value))
+                for key, value in active_values.items()
+            )
+        else:
+            return frozenset(active_values.items())
+    
+    def get(self, cache_key, stats_key, provide, active_values):
+        value = self.values.get(cache_key, _not_found)
+        if value is _not_found:
+            with self._lock:
+                key_lock = self._key_locks.get(cache_key)
+                if key_lock is None:
+                    key_lock = self._key_locks[cache_key] = self._new_key_lock()
+            try:
+                with key_lock:
+                    value = self.values.get(cache_key, _not_found)
+                    if value is _not_found:
+                        return self._provide(cache_key, stats_key, provide, active_values)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(cache_key, None)
+        
+        self.hits[stats_key] = self.hits.get(stats_key, 0) + 1
+        return value
+    
+    def _provide(self, cache_key, stats_key, provide, active_values):
+        self.misses[stats_key] = self.misses.get(stats_key, 0) + 1
+        tracemalloc = sys.modules.get("tracemalloc")
+        if tracemalloc is not None and tracemalloc.is_tracing():
+            before = tracemalloc.get_traced_memory()[0]
+            value = provide()
+            self.allocated[cache_key] = tracemalloc.get_traced_memory()[0] - before
+        else:
+            value = provide()
+        self.values[cache_key] = value
+        if self._weak:
+            self._watch(cache_key, active_values)
+        return value
+    
+    def _weak_token(self, value):
+        try:
+            token = self._weak_tokens.get(value)
+        except TypeError:
+            return value
+        
+        if token is None:
+            token = self._weak_tokens.setdefault(value, _WeakToken())
+        return token
+    
+    def clear(self):
+        self.values = {}
+        self.hits = {}
+        self.misses = {}
+        self.allocated = {}
+        self._references = {}
+    
+    def discard(self, keys):
+        for cache_key in list(self.values):
+            if cache_key[0] in keys:
+                self.values.pop(cache_key, None)
+                self.allocated.pop(cache_key, None)
+                self._references.pop(cache_key, None)
+    
+    def _watch(self, cache_key, active_values):
+        def evict(reference):
+            self.values.pop(cache_key, None)
+            self.allocated.pop(cache_key, None)
+            self._references.pop(cache_key, None)
+        
+        references = []
+        for value in active_values.values():
+            try:
+                references.append(weakref.ref(value, evict))
+            except TypeError:
+                pass
+        
+        if references:
+            self._references[cache_key] = references
+
+
+class _WeakToken(object):
+    __slots__ = ()
 
 
 class _Scope(object):
-    def __init__(self, active_values, cached_values=None):
-        if cached_values is None:
-            cached_values = {}
+    __slots__ = ("_active_values", "_active_key", "_active_scope_key", "_cache", "_level")
+    
+    def __init__(self, active_values, cache=None, level=None, active_scope_key=None):
+        if cache is None:
+            cache = _Cache()
+        if active_scope_key is None:
+            active_scope_key = frozenset(active_values.keys())
         
         self._active_values = active_values
-        self._active_key = frozenset(self._active_values.items())
-        self._active_scope_key = frozenset(self._active_values.keys())
-        self._cached_values = cached_values
+        self._active_key = cache.active_key(self._active_values)
+        self._active_scope_key = active_scope_key
+        self._cache = cache
+        self._level = level
     
     def __contains__(self, key):
         return key in self._active_values
@@ -25,84 +138,690 @@ class _Scope(object):
     def enter(self, instances):
         active_values = self._active_values.copy()
         active_values.update(instances)
-        new_scope = _Scope(active_values, self._cached_values)
+        new_scope = _Scope(active_values, self._cache, self._level)
         return new_scope
     
+    def enter_level(self, instances):
+        active_values = self._active_values.copy()
+        active_values.update(instances)
+        return _ScopeLevel(active_values, self._cache, self._level, self._active_scope_key)
+    
     def cache_get(self, key, provide):
         cache_key = (key, self._active_key)
-        if cache_key not in self._cached_values:
-            self._cached_values[cache_key] = provide()
-            
-        return self._cached_values[cache_key]
+        stats_key = (key, self._active_scope_key)
+        return self._cache.get(cache_key, stats_key, provide, self._active_values)
     
     def in_scope(self, scope_keys):
         active_values = dict(
             (key, self._active_values[key])
             for key in scope_keys
         )
-        return _Scope(active_values, self._cached_values)
+        return _Scope(active_values, self._cache)
+    
+    def level_for(self, scope_keys, active_values=None):
+        if active_values is None:
+            active_values = self._active_values
+        
+        level = self._level
+        if level is None or not scope_keys <= level._active_scope_key:
+            return None
+        
+        while scope_keys <= level._outer_scope_key:
+            level = level._parent
+            if level is None:
+                return None
+        
+        for key in scope_keys:
+            if level._active_values[key] is not active_values[key]:
+                return None
+        return level
+
+
+class _ScopeLevel(_Scope):
+    __slots__ = ("_parent", "_outer_scope_key", "_level_cache")
+    
+    def __init__(self, active_values, cache, parent, outer_scope_key):
+        _Scope.__init__(self, active_values, cache, self)
+        self._parent = parent
+        self._outer_scope_key = outer_scope_key
+        self._level_cache = _Cache()
+    
+    def level_cache_get(self, key, provide):
+        cache_key = (key, self._active_key)
+        stats_key = (key, self._active_scope_key)
+        return self._level_cache.get(cache_key, stats_key, provide, self._active_values)
+    
+    def close(self):
+        self._level_cache.clear()
+
+
+class _InjectorState(object):
+    def __init__(self, bindings, executor):
+        self.bindings = bindings
+        self.executor = executor
+        self.dispatch = {}
+        self.plans = {}
+        self.dependencies = {}
+        self.level_caches = weakref.WeakSet()
+        self.memos = {}
+        self.frozen_states = weakref.WeakSet()
+    
+    def memo(self, key, provider):
+        memo = self.memos.get(key)
+        if memo is None or memo.provider is not provider:
+            memo = self.memos[key] = _Memo(provider)
+        return memo
+    
+    def record_dependency(self, dependent, key):
+        dependencies = self.dependencies.get(dependent)
+        if dependencies is None:
+            dependencies = self.dependencies.setdefault(dependent, set())
+        dependencies.add(key)
+    
+    def dependents(self, key, cache):
+        caches = [cache] + list(self.level_caches)
+        keys = set(self.dispatch) | set(self.dependencies)
+        for plans in list(self.plans.values()):
+            keys.update(list(plans))
+        for cache in caches:
+            keys.update(cache_key for cache_key, active_key in list(cache.values))
+        
+        reverse_dependencies = {}
+        unvisited = list(keys)
+        while unvisited:
+            dependent = unvisited.pop()
+            dependencies = set(self.dependencies.get(dependent, ()))
+            dependencies.update(_static_dependencies(dependent))
+            for dependency in dependencies:
+                if dependency not in keys:
+                    keys.add(dependency)
+                    unvisited.append(dependency)
+                reverse_dependencies.setdefault(dependency, set()).add(dependent)
+        
+        dependents = set([key])
+        unvisited = [key]
+        while unvisited:
+            for dependent in reverse_dependencies.get(unvisited.pop(), ()):
+                if dependent not in dependents:
+                    dependents.add(dependent)
+                    unvisited.append(dependent)
+        return dependents
+
+
+class _Memo(object):
+    def __init__(self, provider):
+        import threading
+        
+        self.provider = provider
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dependency_keys = {}
+        self._lock = threading.Lock()
+    
+    def get(self, injector):
+        with self._lock:
+            dependency_keys = list(self._dependency_keys)
+        
+        probed = {}
+        for keys in dependency_keys:
+            dependencies = tuple(_probe(injector, key, probed) for key in keys)
+            memo_key = (keys, tuple(map(id, dependencies)))
+            with self._lock:
+                entry = self.entries.pop(memo_key, None)
+                if entry is not None:
+                    self.entries[memo_key] = entry
+                    self.hits += 1
+                    return entry[1]
+        
+        recorder = _RecordingInjector(injector, probed)
+        value = self.provider.provider(recorder)
+        with self._lock:
+            self.misses += 1
+            if recorder.memoizable:
+                keys = tuple(key for key, dependency in recorder.resolved)
+                dependencies = tuple(dependency for key, dependency in recorder.resolved)
+                self._add((keys, tuple(map(id, dependencies))), (dependencies, value))
+        return value
+    
+    def _add(self, memo_key, entry):
+        if memo_key not in self.entries:
+            keys = memo_key[0]
+            self._dependency_keys[keys] = self._dependency_keys.get(keys, 0) + 1
+        self.entries[memo_key] = entry
+        maxsize = self.provider.maxsize
+        while maxsize is not None and len(self.entries) > maxsize:
+            keys = self.entries.popitem(last=False)[0][0]
+            self._dependency_keys[keys] -= 1
+            if not self._dependency_keys[keys]:
+                del self._dependency_keys[keys]
+
+
+def _probe(injector, key, probed):
+    value = probed.get(key, _not_found)
+    if value is _not_found:
+        value = probed[key] = injector.get(key)
+    return value
+
+
+class _RecordingInjector(object):
+    def __init__(self, injector, probed):
+        self._injector = injector
+        self._probed = probed
+        self.resolved = []
+        self.memoizable = True
+    
+    def get(self, key, instances=None):
+        if instances:
+            self.memoizable = False
+            return self._injector.get(key, instances)
+        
+        value = _probe(self._injector, key, self._probed)
+        if all(resolved_key != key for resolved_key, dependency in self.resolved):
+            self.resolved.append((key, value))
+        return value
+    
+    def _get_from_type(self, type_to_get):
+        return _type_resolver(type_to_get)(self)
+    
+    def __getattr__(self, name):
+        return getattr(self._injector, name)
+
+
+def _static_dependencies(key):
+    if isinstance(key, _Factory):
+        return [key._key]
+    elif isinstance(key, type) and (hasattr(key.__init__, "_zuice") or key.__dict__.get("_zuice_inject")):
+        return [
+            attr._key
+            for name, attr in _class_spec(key).params
+            if isinstance(attr, _Dependency)
+        ]
+    else:
+        return []
 
 
 class Injector(object):
-    def __init__(self, bindings, _scope=None):
-        self._bindings = bindings.copy()
+    __slots__ = ("_state", "_scope", "_dependent")
+    
+    def __init__(self, bindings, weak_scopes=False, executor=None, _scope=None):
         if _scope is None:
-            _scope = _Scope({})
+            _scope = _Scope({}, _Cache(weak=weak_scopes))
             
+        self._state = _InjectorState(bindings.copy(), executor)
         self._scope = _scope
+        self._dependent = None
     
     def get(self, key, instances=None):
-        if instances:
+        if self._dependent is not None:
+            self._state.record_dependency(self._dependent, key)
+        
+        plan = self._plan(key, instances)
+        if plan is not None:
+            return plan(self, instances)
+        elif instances:
             injector = self._extend_with_instances(instances)
-            return injector.get(key)
+            return injector._get_by_key(key)
         else:
             return self._get_by_key(key)
     
+    def _plan(self, key, instances):
+        if instances:
+            shape = self._scope._active_scope_key.union(instances)
+        else:
+            shape = self._scope._active_scope_key
+        
+        plans = self._state.plans.get(shape)
+        if plans is None:
+            plans = self._state.plans.setdefault(shape, {})
+        try:
+            return plans[key]
+        except KeyError:
+            return plans.setdefault(key, _PlanCompiler(self, shape).compile_plan(key))
+    
+    def cache_stats(self):
+        caches = [self._scope._cache] + list(self._state.level_caches)
+        return zuice.stats.merge_cache_stats(
+            key_stats
+            for cache in caches
+            for key_stats in zuice.stats.collect_cache_stats(
+                cache.values, cache.hits, cache.misses, cache.allocated
+            )
+        )
+    
+    def memo_stats(self):
+        return [
+            zuice.stats.MemoStats(
+                key=key,
+                entries=len(memo.entries),
+                maxsize=memo.provider.maxsize,
+                hits=memo.hits,
+                misses=memo.misses,
+            )
+            for key, memo in list(self._state.memos.items())
+        ]
+    
+    def enter(self, instances):
+        level = self._scope.enter_level(instances)
+        self._state.level_caches.add(level._level_cache)
+        return self._with_scope(level)
+    
+    def close(self):
+        if self._scope._level is self._scope:
+            self._scope.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        self.close()
+    
     def _extend_with_instances(self, instances):
-        return Injector(self._bindings, self._scope.enter(instances))
+        return self._with_scope(self._scope.enter(instances))
     
-    def _get_by_key(self, key):
-        if key == Injector:
-            return self
+    def freeze(self, eager=False):
+        frozen = _FrozenInjector.__new__(_FrozenInjector)
+        frozen._state = _InjectorState(self._state.bindings, self._state.executor)
+        frozen._scope = self._scope
+        frozen._state.memos = self._state.memos
+        self._state.frozen_states.add(frozen._state)
+        frozen._dependent = None
+        frozen._singletons = {}
         
-        elif key in self._scope:
+        if eager:
+            for key, binding in list(frozen._state.bindings._bindings.items()):
+                if binding.scope_key == []:
+                    frozen.get(key)
+        
+        return frozen
+    
+    def rebind(self, key, provider):
+        state = self._state
+        if state.frozen_states:
+            raise TypeError("Cannot rebind keys of an injector that has frozen injectors")
+        
+        bindings = state.bindings._mutable_copy()
+        scope_key = bindings[key].scope_key if key in bindings else None
+        bindings._force_bind(key, _Binding(provider, scope_key))
+        
+        dependents = state.dependents(key, self._scope._cache)
+        state.bindings = bindings
+        state.dispatch.clear()
+        state.plans.clear()
+        state.dependencies.pop(key, None)
+        state.memos.pop(key, None)
+        self._scope._cache.discard(dependents)
+        for cache in list(state.level_caches):
+            cache.discard(dependents)
+    
+    def _with_scope(self, scope):
+        injector = type(self).__new__(type(self))
+        injector._state = self._state
+        injector._scope = scope
+        injector._dependent = self._dependent
+        return injector
+    
+    def _get_by_key(self, key):
+        if key in self._scope and key != Injector:
             return self._scope.get(key)
         
-        elif key in self._bindings:
-            return self._get_from_binding(key, self._bindings[key])
+        try:
+            resolve = self._state.dispatch[key]
+        except KeyError:
+            resolve = self._state.dispatch.setdefault(key, self._resolver(key))
+        return resolve(self)
+    
+    def _resolver(self, key):
+        if key == Injector:
+            return _resolve_injector
+        
+        elif key in self._state.bindings:
+            binding = self._state.bindings[key]
+            return lambda injector: injector._get_from_binding(key, binding)
             
         elif isinstance(key, type):
-            return self._get_from_type(key)
+            return _type_resolver(key)
         
         elif isinstance(key, _Factory):
-            return lambda instances: self.get(key._key, instances)
+            return lambda injector: lambda instances: injector.get(key._key, instances)
         
         else:
-            raise NoSuchBindingException(key)
+            return _missing_resolver(key)
     
     def _get_from_binding(self, key, binding):
         if binding.scope_key is None:
-            return binding.provider(self)
+            return self._run_provider(key, binding.provider)
         else:
-            if self._scope._active_scope_key == frozenset(binding.scope_key):
-                return self._scope.cache_get(key, lambda: binding.provider(self))
+            scope_keys = binding.scope_keys
+            level = self._scope.level_for(scope_keys)
+            if level is not None:
+                return self._get_from_level(key, binding, level)
+            elif self._scope._active_scope_key == scope_keys:
+                return self._scope.cache_get(key, lambda: self._call_provider(key, binding.provider))
             else:
                 injector = self._in_scope(binding.scope_key)
                 return injector.get(key)
     
+    def _get_from_level(self, key, binding, level):
+        injector = self._with_scope(level)
+        return level.level_cache_get(key, lambda: injector._call_provider(key, binding.provider))
+    
+    def _singleton_step(self, key, step):
+        return step
+    
+    def _call_provider(self, key, provider):
+        injector = self._with_scope(self._scope)
+        injector._dependent = key
+        return injector._run_provider(key, provider)
+    
+    def _run_provider(self, key, provider):
+        if isinstance(provider, _MemoizedProvider):
+            return self._state.memo(key, provider).get(self)
+        else:
+            return provider(self)
+    
     def _in_scope(self, scope_keys):
         scope = self._scope.in_scope(scope_keys)
-        return Injector(self._bindings, scope)
+        return self._with_scope(scope)
     
     def _get_from_type(self, type_to_get):
-        if hasattr(type_to_get.__init__, '_zuice'):
-            return type_to_get(___injector=self)
+        return _type_resolver(type_to_get)(self)
+
+
+class _FrozenInjector(Injector):
+    __slots__ = ("_singletons", )
+    
+    def freeze(self, eager=False):
+        return self
+    
+    def _with_scope(self, scope):
+        injector = Injector._with_scope(self, scope)
+        injector._singletons = self._singletons
+        return injector
+    
+    def rebind(self, key, provider):
+        raise TypeError("Cannot rebind keys of a frozen injector")
+    
+    def get(self, key, instances=None):
+        value = self._singletons.get(key, _not_found)
+        if value is _not_found or key in self._scope or (instances and key in instances):
+            return Injector.get(self, key, instances)
+        else:
+            return value
+    
+    def _singleton_step(self, key, step):
+        singletons = self._singletons
         
-        elif zuice.reflect.has_no_arg_constructor(type_to_get):
-            return type_to_get()
+        def frozen_step(context):
+            value = singletons.get(key, _not_found)
+            if value is _not_found:
+                value = singletons.setdefault(key, step(context))
+            return value
         
+        return frozen_step
+    
+    def _get_by_key(self, key):
+        value = self._singletons.get(key, _not_found)
+        if value is _not_found or key in self._scope:
+            return Injector._get_by_key(self, key)
+        else:
+            return value
+    
+    def _resolver(self, key):
+        resolve = Injector._resolver(self, key)
+        bindings = self._state.bindings
+        if key in bindings and bindings[key].scope_key == []:
+            return lambda injector: injector._get_singleton(key, resolve)
         else:
-            raise NoSuchBindingException(type_to_get)
+            return resolve
+    
+    def _get_singleton(self, key, resolve):
+        return self._singletons.setdefault(key, resolve(self))
+
+
+_not_found = object()
+
+
+def _resolve_injector(injector):
+    return injector
+
+
+def _type_resolver(type_to_get):
+    if hasattr(type_to_get.__init__, '_zuice'):
+        return lambda injector: type_to_get(___injector=injector)
+    
+    elif type_to_get.__dict__.get("_zuice_inject"):
+        params = _class_spec(type_to_get).params
+        return lambda injector: type_to_get(**dict(zip(
+            [key for key, attr in params],
+            _inject_params(type_to_get, params, injector)
+        )))
+    
+    elif _has_no_arg_constructor(type_to_get):
+        return lambda injector: type_to_get()
+    
+    else:
+        return _missing_resolver(type_to_get)
+
+
+_no_arg_constructors = weakref.WeakKeyDictionary()
+
+
+def _has_no_arg_constructor(cls):
+    result = _no_arg_constructors.get(cls)
+    if result is None:
+        result = zuice.metadata.lookup(cls, "has_no_arg_constructor")
+        if result is None:
+            result = zuice.reflect.has_no_arg_constructor(cls)
+            zuice.metadata.record(cls, "has_no_arg_constructor", result)
+        _no_arg_constructors[cls] = result
+    return result
+
+
+class _PlanCompiler(object):
+    def __init__(self, injector, shape):
+        self._injector = injector
+        self._shape = shape
+        self._singleton_injector = None
+    
+    def compile_plan(self, key):
+        step = self._compile(key, ())
+        if step is None:
+            return None
+        
+        direct_plan = self._compile_direct(key)
+        if direct_plan is not None:
+            return direct_plan
+        
+        def plan(injector, instances):
+            return step(_PlanContext(injector, instances))
+        
+        return plan
+    
+    def _compile_direct(self, key):
+        if key in self._shape and key != Injector:
+            def plan(injector, instances):
+                if instances and key in instances:
+                    return instances[key]
+                else:
+                    return injector._scope.get(key)
+            
+            return plan
+        
+        elif key in self._injector._state.bindings:
+            binding = self._injector._state.bindings[key]
+            if binding.scope_key is None:
+                provider = binding.provider
+                
+                def plan(injector, instances):
+                    if instances:
+                        injector = injector._extend_with_instances(instances)
+                    return injector._run_provider(key, provider)
+                
+                return plan
+            
+            elif not binding.scope_keys:
+                step = self._compile_binding(key, binding)
+                return lambda injector, instances: step(None)
+        
+        return None
+    
+    def _compile(self, key, compiling):
+        if key in self._shape and key != Injector:
+            return lambda context: context.values[key]
+        
+        elif key == Injector:
+            return lambda context: context.injector()
+        
+        elif key in self._injector._state.bindings:
+            return self._compile_binding(key, self._injector._state.bindings[key])
+        
+        elif isinstance(key, type):
+            if key in compiling:
+                return None
+            else:
+                return self._compile_type(key, compiling + (key, ))
+        
+        elif isinstance(key, _Factory):
+            return lambda context: lambda instances: context.injector().get(key._key, instances)
+        
+        else:
+            return None
+    
+    def _compile_binding(self, key, binding):
+        provider = binding.provider
+        if binding.scope_key is None:
+            return lambda context: context.injector()._run_provider(key, provider)
+        
+        scope_keys = binding.scope_keys
+        if not scope_keys:
+            if self._singleton_injector is None:
+                self._singleton_injector = self._injector._in_scope(scope_keys)
+            singleton_injector = self._singleton_injector
+            provide = lambda: singleton_injector._call_provider(key, provider)
+            return self._injector._singleton_step(
+                key, lambda context: singleton_injector._scope.cache_get(key, provide)
+            )
+        
+        elif scope_keys <= self._shape:
+            def step(context):
+                level = context.level_for(scope_keys)
+                if level is not None:
+                    return context._injector._get_from_level(key, binding, level)
+                
+                injector = context.injector_in(scope_keys)
+                return injector._scope.cache_get(key, lambda: injector._call_provider(key, provider))
+            
+            return step
+        
+        else:
+            return None
+    
+    def _compile_type(self, cls, compiling):
+        if cls.__init__ is Base.__init__:
+            spec = _class_spec(cls)
+            children = self._compile_params(spec.params, compiling)
+            if children is None:
+                return None
+            inits = spec.inits
+            resolve_children = self._children_resolver(cls, children)
+            
+            def step(context):
+                value = cls.__new__(cls)
+                for key, child_value in resolve_children(context):
+                    setattr(value, key, child_value)
+                for key in inits:
+                    getattr(value, key)()
+                return value
+            
+            return step
+        
+        elif cls.__dict__.get("_zuice_inject"):
+            children = self._compile_params(_class_spec(cls).params, compiling)
+            if children is None:
+                return None
+            resolve_children = self._children_resolver(cls, children)
+            
+            return lambda context: cls(**dict(resolve_children(context)))
+        
+        elif _has_no_arg_constructor(cls):
+            return lambda context: cls()
+        
+        else:
+            return None
+    
+    def _children_resolver(self, cls, children):
+        keys = [key for key, child in children]
+        executor = getattr(cls, "_zuice_executor", None) or self._injector._state.executor
+        if executor is None:
+            return lambda context: [(key, child(context)) for key, child in children]
+        else:
+            return lambda context: zip(keys, _resolve_in_parallel(executor, [
+                functools.partial(child, context)
+                for key, child in children
+            ]))
+    
+    def _compile_params(self, params, compiling):
+        children = []
+        for key, attr in params:
+            if not isinstance(attr, _Dependency):
+                return None
+            child = self._compile(attr._key, compiling)
+            if child is None:
+                return None
+            children.append((key, child))
+        return children
+
+
+class _PlanContext(object):
+    __slots__ = ("_injector", "_instances", "_full_injector", "_scoped_injectors", "values")
+    
+    def __init__(self, injector, instances):
+        self._injector = injector
+        self._instances = instances
+        self._full_injector = None
+        self._scoped_injectors = None
+        
+        active_values = injector._scope._active_values
+        if not instances:
+            self.values = active_values
+        elif active_values:
+            self.values = active_values.copy()
+            self.values.update(instances)
+        else:
+            self.values = instances
+    
+    def injector(self):
+        if self._full_injector is None:
+            if self._instances:
+                self._full_injector = self._injector._extend_with_instances(self._instances)
+            else:
+                self._full_injector = self._injector
+        return self._full_injector
+    
+    def level_for(self, scope_keys):
+        return self._injector._scope.level_for(scope_keys, self.values)
+    
+    def injector_in(self, scope_keys):
+        if self._scoped_injectors is None:
+            self._scoped_injectors = {}
+        
+        injector = self._scoped_injectors.get(scope_keys)
+        if injector is None:
+            scope = _Scope(
+                dict((key, self.values[key]) for key in scope_keys),
+                self._injector._scope._cache,
+                active_scope_key=scope_keys,
+            )
+            injector = self._scoped_injectors[scope_keys] = self._injector._with_scope(scope)
+        return injector
+
+
+def _missing_resolver(key):
+    def resolve(injector):
+        raise NoSuchBindingException(key)
+    
+    return resolve
 
 
 class NoSuchBindingException(Exception):
@@ -134,52 +853,108 @@ def dependency(key):
 
 
 class _Key(object):
+    __slots__ = ("_name", "__weakref__")
+    
     def __init__(self, name):
         self._name = name
     
     def __repr__(self):
         return "Key({0})".format(repr(self._name))
     
+    def __reduce__(self):
+        return (key, (self._name, ))
+
+
+_keys = {}
+
 
 def key(name):
-    return _Key(name)
+    try:
+        return _keys[name]
+    except KeyError:
+        return _keys.setdefault(name, _Key(name))
 
 
 class Base(object):
     def __init__(self, *args, **kwargs):
-        attrs = [(key, getattr(self, key)) for key in dir(type(self))]
+        spec = _class_spec(type(self))
         
-        params = [
-            (key, attr)
-            for (key, attr) in attrs
-            if isinstance(attr, _Parameter)
-        ]
         if '___injector' in kwargs:
             injector = kwargs.pop('___injector')
-            for key, attr in params:
-                setattr(self, key, attr.inject(injector))
+            values = _inject_params(type(self), spec.params, injector)
+            for (key, attr), value in zip(spec.params, values):
+                setattr(self, key, value)
         else:
-            _manual_injection(self, params, args, kwargs)
+            _manual_injection(self, spec.params, args, kwargs)
         
-        inits = sorted(
-            (attr for key, attr in attrs if hasattr(attr, "_zuice_init")),
-            key=lambda attr: attr._zuice_init
-        )
-        for init in inits:
-            init()
+        for key in spec.inits:
+            getattr(self, key)()
         
         _check_keyword_arguments_consumed(kwargs)
     
     __init__._zuice = True
 
 
+def _inject_params(cls, params, injector):
+    executor = getattr(cls, "_zuice_executor", None) or injector._state.executor
+    if executor is None:
+        return [attr.inject(injector) for key, attr in params]
+    else:
+        return _resolve_in_parallel(executor, [
+            functools.partial(attr.inject, injector)
+            for key, attr in params
+        ])
+
+
+_worker_state = None
+
+
+def _resolve_in_parallel(executor, resolvers):
+    global _worker_state
+    if _worker_state is None:
+        import threading
+        _worker_state = threading.local()
+    
+    if len(resolvers) < 2 or getattr(_worker_state, "active", False):
+        return [resolve() for resolve in resolvers]
+    
+    futures = [executor.submit(_resolve_in_worker, resolve) for resolve in resolvers[1:]]
+    try:
+        values = [resolvers[0]()]
+        for resolve, future in zip(resolvers[1:], futures):
+            if future.cancel():
+                values.append(resolve())
+            else:
+                values.append(future.result())
+        return values
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+
+def _resolve_in_worker(resolve):
+    _worker_state.active = True
+    try:
+        return resolve()
+    finally:
+        _worker_state.active = False
+
+
+def parallel(executor):
+    def decorate(cls):
+        cls._zuice_executor = executor
+        return cls
+    
+    return decorate
+
+
 def _manual_injection(self, attrs, args, kwargs):
     if len(args) > len(attrs):
         raise TypeError(
             "__init__ takes exactly %s arguments (%s given)" %
                 (len(attrs) + 1, len(args) + 1)
         )
-    attrs.sort(key=lambda item: item[1]._ordering)
     for index, (key, attr) in enumerate(attrs):
         arg_name = _key_to_arg_name(key)
         
@@ -191,7 +966,136 @@ def _manual_injection(self, attrs, args, kwargs):
             setattr(self, key, kwargs.pop(arg_name))
         else:
             raise _missing_keyword_argument_error(arg_name)
+
+
+class _ClassSpec(object):
+    def __init__(self, params, inits):
+        self.params = params
+        self.inits = inits
+
+
+def _class_spec(cls):
+    spec = cls.__dict__.get("_zuice_spec")
+    if spec is None:
+        spec = _load_spec(cls)
+        if spec is None:
+            if issubclass(cls, Base):
+                spec = _read_base_spec(cls)
+            else:
+                spec = _read_constructor_spec(cls)
+            _record_spec(cls, spec)
+        cls._zuice_spec = spec
+    return spec
+
+
+def _load_spec(cls):
+    data = zuice.metadata.lookup(cls, "spec")
+    if data is None:
+        return None
+    
+    try:
+        params = []
+        for key, key_data in data["params"]:
+            if key_data is None:
+                attr = getattr(cls, key)
+                if not isinstance(attr, _Parameter):
+                    return None
+            else:
+                attr = _Dependency(zuice.metadata.deserialize_key(key_data))
+            params.append((key, attr))
+        
+        for key in data["inits"]:
+            if not hasattr(getattr(cls, key), "_zuice_init"):
+                return None
+    except (AttributeError, ImportError, ValueError):
+        return None
+    
+    return _ClassSpec(params, data["inits"])
+
+
+def _record_spec(cls, spec):
+    try:
+        params = [
+            (key, None if getattr(cls, key, None) is attr else zuice.metadata.serialize_key(attr._key))
+            for key, attr in spec.params
+        ]
+    except ValueError:
+        return
+    
+    zuice.metadata.record(cls, "spec", {"params": params, "inits": spec.inits})
+
+
+def _read_base_spec(cls):
+    params = []
+    inits = []
+    for key in dir(cls):
+        attr = getattr(cls, key)
+        if isinstance(attr, _Parameter):
+            params.append((key, attr))
+        elif hasattr(attr, "_zuice_init"):
+            inits.append((attr._zuice_init, key))
+    
+    params.sort(key=lambda item: item[1]._ordering)
+    params += [
+        (key, _Dependency(hint_key))
+        for key, hint_key in _annotated_attributes(cls)
+        if not hasattr(cls, key)
+    ]
+    return _ClassSpec(params, [key for ordering, key in sorted(inits)])
+
+
+def _annotated_attributes(cls):
+    names = set()
+    for base in cls.__mro__:
+        if base.__dict__.get("_zuice_inject"):
+            names.update(base.__dict__.get("__annotations__", ()))
+    if not names:
+        return []
+    
+    import typing
+    return [
+        (key, _hint_to_key(hint))
+        for key, hint in _get_type_hints(cls).items()
+        if key in names and getattr(hint, "__origin__", None) is not typing.ClassVar
+    ]
+
+
+def _get_type_hints(obj):
+    import typing
+    try:
+        return typing.get_type_hints(obj, include_extras=True)
+    except TypeError:
+        return typing.get_type_hints(obj)
+
+
+def _hint_to_key(hint):
+    metadata = getattr(hint, "__metadata__", None)
+    if metadata:
+        return metadata[0]
+    else:
+        return hint
+
+
+def _read_constructor_spec(cls):
+    import inspect
     
+    hints = _get_type_hints(cls.__init__)
+    params = []
+    for parameter in list(inspect.signature(cls.__init__).parameters.values())[1:]:
+        if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+            continue
+        elif parameter.name in hints:
+            params.append((parameter.name, _Dependency(_hint_to_key(hints[parameter.name]))))
+        elif parameter.default is parameter.empty:
+            raise TypeError("Cannot inject {0}: parameter {1!r} has no annotation".format(
+                cls.__name__, parameter.name
+            ))
+    return _ClassSpec(params, [])
+
+
+def inject(cls):
+    cls._zuice_inject = True
+    return cls
 
 
 def _key_to_arg_name(key):
@@ -224,5 +1128,14 @@ class _Factory(object):
     def __init__(self, key):
         self._key = key
     
+    def __eq__(self, other):
+        return isinstance(other, _Factory) and self._key == other._key
+    
+    def __ne__(self, other):
+        return not (self == other)
+    
+    def __hash__(self):
+        return hash((_Factory, self._key))
+    
     def __repr__(self):
         return "factory({0})".format(self._key)
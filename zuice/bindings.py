@@ -1,6 +1,19 @@
+import functools
+import operator
+
+import zuice.reflect
+
+
+try:
+    from types import MappingProxyType as _frozen_dict
+except ImportError:
+    _frozen_dict = dict
+
+
 class Bindings(object):
     def __init__(self):
         self._bindings = {}
+        self._frozen = False
     
     def bind(self, key, provider=None):
         if key in self:
@@ -12,19 +25,39 @@ class Bindings(object):
             self._force_bind(key, provider)
     
     def _force_bind(self, key, provider):
+        self._check_not_frozen()
         self._bindings[key] = provider
     
     def copy(self):
+        if self._frozen:
+            return self
+        else:
+            return self._mutable_copy()
+    
+    def _mutable_copy(self):
         copy = Bindings()
         copy._bindings = self._bindings.copy()
         return copy
     
     def update(self, bindings):
-        for key in bindings._bindings:
-            if key in self._bindings:
-                raise AlreadyBoundException("Key already bound: %s" % key)
+        self._check_not_frozen()
+        merged = {}
+        for key in _keys(self._bindings) & _keys(bindings._bindings):
+            merged[key] = _merge_bindings(key, self._bindings[key], bindings._bindings[key])
+        self._bindings.update(bindings._bindings)
+        self._bindings.update(merged)
+    
+    def _override(self, bindings):
+        self._check_not_frozen()
         self._bindings.update(bindings._bindings)
     
+    def _freeze(self):
+        self._frozen = True
+    
+    def _check_not_frozen(self):
+        if self._frozen:
+            raise TypeError("Cannot modify composed bindings")
+    
     def __contains__(self, key):
         return key in self._bindings
         
@@ -36,6 +69,65 @@ class Bindings(object):
     
     def scope(self, key):
         return _ScopedBindings(self, [key])
+    
+    def multibind(self, key):
+        if not isinstance(key, _CollectionKey):
+            raise TypeError("Can only multibind SetOf or MapOf keys, not: %s" % key)
+        if key not in self:
+            self._force_bind(key, _Binding(key._empty_provider(), None))
+        elif not isinstance(self[key].provider, _CollectionProvider):
+            raise AlreadyBoundException("Key already bound: %s" % key)
+        return _MultiBinder(key, self)
+
+
+def _keys(dictionary):
+    return getattr(dictionary, "viewkeys", dictionary.keys)()
+
+
+class Module(object):
+    def __init__(self, configure=None, includes=()):
+        self._configure = configure
+        self.includes = tuple(includes)
+        self._bindings = None
+    
+    def configure(self, bindings):
+        if self._configure is not None:
+            self._configure(bindings)
+    
+    def bindings(self):
+        if self._bindings is None:
+            bindings = Bindings()
+            self.configure(bindings)
+            self._bindings = bindings
+        return self._bindings
+
+
+def compose(modules, overrides=()):
+    bindings = Bindings()
+    for module in _installation_order(modules):
+        bindings.update(module.bindings())
+    
+    if overrides:
+        bindings._override(compose(overrides))
+    
+    bindings._freeze()
+    return bindings
+
+
+def _installation_order(modules):
+    installed = set()
+    order = []
+    
+    def install(module):
+        if id(module) not in installed:
+            installed.add(id(module))
+            for included in module.includes:
+                install(included)
+            order.append(module)
+    
+    for module in modules:
+        install(module)
+    return order
 
 
 class _ScopedBindings(object):
@@ -54,6 +146,8 @@ class _ScopedBindings(object):
 
 
 class Binder(object):
+    __slots__ = ("_key", "_bindings", "_scope_key")
+    
     def __init__(self, key, bindings, scope_key=None):
         self._key = key
         self._bindings = bindings
@@ -70,6 +164,9 @@ class Binder(object):
     def to_type(self, key):
         return self.to_key(key)
     
+    def to_import(self, path):
+        return self.to_provider(_ImportedTypeProvider(self._key, path))
+    
     def to_provider(self, provider):
         self._bindings.bind(self._key, _Binding(provider, self._scope_key))
         return self
@@ -78,12 +175,180 @@ class Binder(object):
         current_provider = self._bindings.get(self._key)
         self._bindings._force_bind(self._key, _Binding(current_provider.provider, []))
         return self
+    
+    def memoized(self, maxsize=128):
+        current_binding = self._bindings.get(self._key)
+        if self._key in self._bindings:
+            scope_key = current_binding.scope_key
+        else:
+            scope_key = self._scope_key
+        provider = _MemoizedProvider(current_binding.provider, maxsize)
+        self._bindings._force_bind(self._key, _Binding(provider, scope_key))
+        return self
+
+
+class _MultiBinder(object):
+    def __init__(self, key, bindings):
+        self._key = key
+        self._bindings = bindings
+    
+    def add(self, entry=None):
+        element_key = _ElementKey(self._key, entry)
+        self._update_provider(lambda provider: provider.add(entry, element_key))
+        return Binder(element_key, self._bindings)
+    
+    def parallel(self, executor):
+        self._update_provider(lambda provider: provider.with_executor(executor))
+        return self
+    
+    def singleton(self):
+        current_binding = self._bindings[self._key]
+        self._bindings._force_bind(self._key, _Binding(current_binding.provider, []))
+        return self
+    
+    def _update_provider(self, update):
+        current_binding = self._bindings[self._key]
+        provider = update(current_binding.provider)
+        self._bindings._force_bind(self._key, _Binding(provider, current_binding.scope_key))
+
+
+class _CollectionKey(object):
+    def __init__(self, key):
+        self._key = key
+    
+    def __eq__(self, other):
+        return type(self) is type(other) and self._key == other._key
+    
+    def __ne__(self, other):
+        return not (self == other)
+    
+    def __hash__(self):
+        return hash((type(self), self._key))
+    
+    def __repr__(self):
+        return "{0}({1!r})".format(type(self).__name__, self._key)
+
+
+class SetOf(_CollectionKey):
+    def _empty_provider(self):
+        return _SetProvider((), None)
+
 
+class MapOf(_CollectionKey):
+    def _empty_provider(self):
+        return _MapProvider((), None)
 
-class _Binding(object):
-    def __init__(self, provider, scope_key):
+
+class _ElementKey(object):
+    def __init__(self, collection_key, entry):
+        self._collection_key = collection_key
+        self._entry = entry
+    
+    def __repr__(self):
+        if self._entry is None:
+            return "element of {0!r}".format(self._collection_key)
+        else:
+            return "{0!r}[{1!r}]".format(self._collection_key, self._entry)
+
+
+class _CollectionProvider(object):
+    def __init__(self, entries, executor):
+        self._entries = entries
+        self._executor = executor
+    
+    def __call__(self, injector):
+        keys = [element_key for entry, element_key in self._entries]
+        if self._executor is None:
+            values = [injector.get(key) for key in keys]
+        else:
+            values = zuice._resolve_in_parallel(self._executor, [
+                functools.partial(injector.get, key)
+                for key in keys
+            ])
+        return self._build([entry for entry, element_key in self._entries], values)
+    
+    def add(self, entry, element_key):
+        return self.merge(type(self)(((entry, element_key), ), None))
+    
+    def with_executor(self, executor):
+        return type(self)(self._entries, executor)
+    
+    def merge(self, other):
+        if type(self) is not type(other):
+            raise AlreadyBoundException("Cannot merge {0} with {1}".format(
+                type(self).__name__, type(other).__name__
+            ))
+        self._check_entries(other._entries)
+        return type(self)(self._entries + other._entries, self._executor or other._executor)
+    
+
+class _SetProvider(_CollectionProvider):
+    def _check_entries(self, entries):
+        for entry, element_key in entries:
+            if entry is not None:
+                raise TypeError("Elements of SetOf cannot have entry keys")
+    
+    def _build(self, entries, values):
+        return tuple(values)
+
+
+class _MapProvider(_CollectionProvider):
+    def _check_entries(self, entries):
+        existing_entries = set(entry for entry, element_key in self._entries)
+        for entry, element_key in entries:
+            if entry is None:
+                raise TypeError("Elements of MapOf must have entry keys")
+            if entry in existing_entries:
+                raise AlreadyBoundException("Entry already bound: %s" % entry)
+            existing_entries.add(entry)
+    
+    def _build(self, entries, values):
+        return _frozen_dict(dict(zip(entries, values)))
+
+
+def _merge_bindings(key, binding, other):
+    if not isinstance(binding.provider, _CollectionProvider) or not isinstance(other.provider, _CollectionProvider):
+        raise AlreadyBoundException("Key already bound: %s" % key)
+    
+    provider = binding.provider.merge(other.provider)
+    scope_key = other.scope_key if binding.scope_key is None else binding.scope_key
+    return _Binding(provider, scope_key)
+
+
+class _ImportedTypeProvider(object):
+    def __init__(self, key, path):
+        self._key = key
+        self._path = path
+        self._type = None
+    
+    def __call__(self, injector):
+        if self._type is None:
+            imported_type = zuice.reflect.import_path(self._path)
+            if imported_type is self._key:
+                raise TypeError("Cannot bind a key to itself")
+            self._type = imported_type
+        return injector.get(self._type)
+
+
+class _MemoizedProvider(object):
+    def __init__(self, provider, maxsize):
         self.provider = provider
-        self.scope_key = scope_key
+        self.maxsize = maxsize
+    
+    def __call__(self, injector):
+        return self.provider(injector)
+
+
+class _Binding(tuple):
+    __slots__ = ()
+    
+    def __new__(cls, provider, scope_key):
+        scope_keys = None if scope_key is None else frozenset(scope_key or ())
+        return tuple.__new__(cls, (provider, scope_key, scope_keys))
+    
+    provider = property(operator.itemgetter(0))
+    scope_key = property(operator.itemgetter(1))
+    scope_keys = property(operator.itemgetter(2))
 
 
 class AlreadyBoundException(Exception):
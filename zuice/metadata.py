@@ -0,0 +1,134 @@
+import os
+import sys
+
+import zuice.reflect
+
+
+_format = "1/{0}.{1}".format(*sys.version_info[:2])
+
+_enabled = False
+_loaded = {}
+_recorded = {}
+_module_stamps = {}
+
+
+def load(path):
+    global _enabled
+    import json
+    
+    _enabled = True
+    try:
+        with open(path) as cache_file:
+            data = json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        return
+    
+    if isinstance(data, dict) and data.get("format") == _format:
+        _loaded.update(data.get("classes", {}))
+
+
+def save(path):
+    import json
+    
+    classes = dict(_loaded)
+    for name, entry in _recorded.items():
+        if name in classes and classes[name]["stamps"] == entry["stamps"]:
+            classes[name] = dict(classes[name], **entry)
+        else:
+            classes[name] = entry
+    
+    temp_path = "{0}.{1}.tmp".format(path, os.getpid())
+    with open(temp_path, "w") as cache_file:
+        json.dump({"format": _format, "classes": classes}, cache_file)
+    os.rename(temp_path, path)
+
+
+def lookup(cls, field):
+    if not _loaded:
+        return None
+    
+    name = _class_name(cls)
+    entry = _loaded.get(name)
+    if entry is None or field not in entry:
+        return None
+    elif entry["stamps"] != _stamps(cls):
+        del _loaded[name]
+        return None
+    else:
+        return entry[field]
+
+
+def record(cls, field, value):
+    if not _enabled:
+        return
+    
+    name = _class_name(cls)
+    if name is None:
+        return
+    
+    stamps = _stamps(cls)
+    entry = _recorded.get(name)
+    if entry is None or entry["stamps"] != stamps:
+        entry = _recorded[name] = {"stamps": stamps}
+    entry[field] = value
+
+
+def serialize_key(key):
+    import zuice
+    
+    if isinstance(key, type):
+        name = _class_name(key)
+        if name is not None:
+            return {"type": name}
+    elif isinstance(key, zuice._Key) and isinstance(key._name, str):
+        return {"key": key._name}
+    elif isinstance(key, str):
+        return {"name": key}
+    
+    raise ValueError("Cannot serialize key: {0!r}".format(key))
+
+
+def deserialize_key(data):
+    import zuice
+    
+    if "type" in data:
+        return zuice.reflect.import_path(data["type"])
+    elif "key" in data:
+        return zuice.key(data["key"])
+    else:
+        return data["name"]
+
+
+def _class_name(cls):
+    qualname = getattr(cls, "__qualname__", cls.__name__)
+    if "<locals>" in qualname:
+        return None
+    else:
+        return "{0}:{1}".format(cls.__module__, qualname)
+
+
+def _stamps(cls):
+    stamps = {}
+    for base in cls.__mro__:
+        module_name = base.__module__
+        if module_name not in stamps:
+            stamp = _module_stamp(module_name)
+            if stamp is not None:
+                stamps[module_name] = stamp
+    return stamps
+
+
+def _module_stamp(module_name):
+    if module_name not in _module_stamps:
+        path = getattr(sys.modules.get(module_name), "__file__", None)
+        if path is None:
+            stamp = None
+        else:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stamp = None
+            else:
+                stamp = [getattr(stat, "st_mtime_ns", stat.st_mtime), stat.st_size]
+        _module_stamps[module_name] = stamp
+    return _module_stamps[module_name]
@@ -1,12 +1,21 @@
-import inspect
-
-
 def has_no_arg_constructor(cls):
     constructor = cls.__init__
     
     if constructor is object.__init__:
         return True
     
-    arg_specs = inspect.getargspec(constructor)
+    import inspect
+    getargspec = getattr(inspect, "getfullargspec", None) or inspect.getargspec
+    arg_specs = getargspec(constructor)
     arg_names = arg_specs[0]
     return len(arg_names) == 1
+
+
+def import_path(path):
+    import importlib
+    
+    module_name, attr_path = path.split(":", 1)
+    value = importlib.import_module(module_name)
+    for attr_name in attr_path.split("."):
+        value = getattr(value, attr_name)
+    return value
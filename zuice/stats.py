@@ -0,0 +1,129 @@
+import collections
+import sys
+
+
+CacheStats = collections.namedtuple(
+    "CacheStats",
+    ["scope_keys", "key", "entries", "hits", "misses", "size", "allocated"]
+)
+
+MemoStats = collections.namedtuple(
+    "MemoStats",
+    ["key", "entries", "maxsize", "hits", "misses"]
+)
+
+
+def collect_cache_stats(values, hits, misses, allocated):
+    entries = {}
+    sizes = {}
+    allocations = {}
+    for cache_key, value in list(values.items()):
+        key, active_key = cache_key
+        stats_key = (key, frozenset(scope_key for scope_key, scope_value in active_key))
+        entries[stats_key] = entries.get(stats_key, 0) + 1
+        sizes[stats_key] = sizes.get(stats_key, 0) + sys.getsizeof(value)
+        if cache_key in allocated:
+            allocations[stats_key] = allocations.get(stats_key, 0) + allocated[cache_key]
+    
+    stats_keys = set(entries) | set(hits) | set(misses)
+    return [
+        CacheStats(
+            scope_keys=scope_keys,
+            key=key,
+            entries=entries.get((key, scope_keys), 0),
+            hits=hits.get((key, scope_keys), 0),
+            misses=misses.get((key, scope_keys), 0),
+            size=sizes.get((key, scope_keys), 0),
+            allocated=allocations.get((key, scope_keys)),
+        )
+        for key, scope_keys in stats_keys
+    ]
+
+
+def merge_cache_stats(stats):
+    merged = {}
+    for key_stats in stats:
+        stats_key = (key_stats.key, key_stats.scope_keys)
+        other = merged.get(stats_key)
+        if other is None:
+            merged[stats_key] = key_stats
+        else:
+            if other.allocated is None:
+                allocated = key_stats.allocated
+            elif key_stats.allocated is None:
+                allocated = other.allocated
+            else:
+                allocated = other.allocated + key_stats.allocated
+            merged[stats_key] = CacheStats(
+                scope_keys=key_stats.scope_keys,
+                key=key_stats.key,
+                entries=other.entries + key_stats.entries,
+                hits=other.hits + key_stats.hits,
+                misses=other.misses + key_stats.misses,
+                size=other.size + key_stats.size,
+                allocated=allocated,
+            )
+    return list(merged.values())
+
+
+def format_cache_stats(stats):
+    by_scope = collections.defaultdict(list)
+    for key_stats in stats:
+        by_scope[key_stats.scope_keys].append(key_stats)
+    
+    lines = []
+    for scope_keys, scope_stats in sorted(by_scope.items(), key=lambda item: _describe_scope(item[0])):
+        lines.append("{0}: {1} entries, {2} hits, {3} misses, {4} bytes".format(
+            _describe_scope(scope_keys),
+            sum(key_stats.entries for key_stats in scope_stats),
+            sum(key_stats.hits for key_stats in scope_stats),
+            sum(key_stats.misses for key_stats in scope_stats),
+            sum(key_stats.size for key_stats in scope_stats),
+        ))
+        for key_stats in sorted(scope_stats, key=lambda key_stats: -key_stats.size):
+            lines.append("    {0!r}: {1} entries, {2} hits, {3} misses, {4} bytes{5}".format(
+                key_stats.key,
+                key_stats.entries,
+                key_stats.hits,
+                key_stats.misses,
+                key_stats.size,
+                "" if key_stats.allocated is None else " ({0} bytes allocated)".format(key_stats.allocated),
+            ))
+    return "\n".join(lines)
+
+
+def _describe_scope(scope_keys):
+    if scope_keys:
+        return "scope({0})".format(", ".join(sorted(repr(key) for key in scope_keys)))
+    else:
+        return "singleton"
+
+
+def dump_periodically(injector, interval, log=None):
+    import threading
+    
+    if log is None:
+        import logging
+
+        log = logging.getLogger("zuice.stats").info
+    
+    stopped = threading.Event()
+    
+    def dump():
+        while not stopped.wait(interval):
+            log(format_cache_stats(injector.cache_stats()))
+    
+    thread = threading.Thread(target=dump, name="zuice-cache-stats")
+    thread.daemon = True
+    thread.start()
+    return _PeriodicDump(stopped, thread)
+
+
+class _PeriodicDump(object):
+    def __init__(self, stopped, thread):
+        self._stopped = stopped
+        self._thread = thread
+    
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()